@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .fines import current_fines
 from .models import *
 
 
@@ -6,7 +7,16 @@ class MembersAdmin(admin.ModelAdmin):
     list_display = ('member_id', 'member_name', 'member_email')
 
 class IssuedBooksAdmin(admin.ModelAdmin):
-    list_display = ('book_id', 'issued_to_member', 'issue_date', 'return_date', 'fine' )
+    list_display = ('book_id', 'issued_to_member', 'issue_date', 'return_date', 'current_fine' )
+
+    def get_queryset(self, request):
+        # The stored fine of an open loan is only its first overdue day's
+        return current_fines(super().get_queryset(request))
+
+    @admin.display(description='Fine', ordering='current_fine')
+    def current_fine(self, obj):
+        return obj.current_fine
+
 admin.site.register(Members, MembersAdmin)
 admin.site.register(IssuedBooks, IssuedBooksAdmin)
 
@@ -2,6 +2,7 @@
 # Add this to your admin.py file to register models in Django admin
 
 from django.contrib import admin
+from .fines import current_fines
 from .models import Members, IssuedBooks, BookStock, FineSettings
 
 
@@ -15,11 +16,19 @@ class MembersAdmin(admin.ModelAdmin):
 
 @admin.register(IssuedBooks)
 class IssuedBooksAdmin(admin.ModelAdmin):
-    list_display = ('book_id', 'book_title', 'issued_to_member', 'status', 'issue_date', 'return_date', 'fine')
+    list_display = ('book_id', 'book_title', 'issued_to_member', 'status', 'issue_date', 'return_date', 'current_fine')
     list_filter = ('status', 'issue_date')
     search_fields = ('book_title', 'book_author')
     readonly_fields = ('issue_date',)
 
+    def get_queryset(self, request):
+        # The stored fine of an open loan is only its first overdue day's
+        return current_fines(super().get_queryset(request))
+
+    @admin.display(description='Fine', ordering='current_fine')
+    def current_fine(self, obj):
+        return obj.current_fine
+
 
 @admin.register(BookStock)
 class BookStockAdmin(admin.ModelAdmin):
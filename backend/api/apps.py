@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if getattr(settings, 'METRICS_ENABLED', True) or getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            # Counts queries for MetricsMiddleware and ServerTimingMiddleware
+            from .timing import install_query_counter
+            connection_created.connect(install_query_counter)
+
+        if getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            from .slow_queries import install_slow_query_logger
+            connection_created.connect(install_slow_query_logger)
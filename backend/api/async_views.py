@@ -0,0 +1,48 @@
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .catalog import catalog_cache
+from .models import Book
+from .timing import span
+from .upstream_async import fetch_books_async, request_client
+from .views import BooksListAPI, upstream_books_payload
+
+_books_list = BooksListAPI.as_view()
+
+
+def _has_local_catalog():
+    return Book.objects.exists() or catalog_cache.exists()
+
+
+@require_GET
+async def books_list_async(request):
+    """GET /books/async/: BooksListAPI for ASGI servers.
+
+    Local catalogs are served by the synchronous view in a worker thread.
+    The Frappe fallback awaits upstream pages on the event loop, so one
+    worker can keep many slow upstream requests in flight; only the stock
+    lookup touches the ORM, in a thread.
+    """
+    if await sync_to_async(_has_local_catalog)():
+        return await sync_to_async(_books_list)(request)
+
+    try:
+        count = int(request.GET.get('count', 20))
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        return JsonResponse({'error': 'count and page must be integers'}, status=400)
+
+    # Under WSGI, async_to_sync runs this view on a loop discarded after the request
+    client = nullcontext() if isinstance(request, ASGIRequest) else request_client()
+    with span('upstream'):
+        async with client:
+            books, error = await fetch_books_async(
+                count, start_page=page, title=request.GET.get('title'), authors=request.GET.get('authors'),
+            )
+    with span('enrich'):
+        payload, status_code = await sync_to_async(upstream_books_payload)(books, error)
+    return JsonResponse(payload, status=status_code, safe=False)
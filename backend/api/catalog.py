@@ -0,0 +1,229 @@
+import itertools
+import json
+import logging
+import os
+import threading
+
+from .metrics import record_cache_lookup, record_catalog_reload
+from .ngram import TrigramIndex, scan
+
+logger = logging.getLogger(__name__)
+
+# Path to the local BTech catalog generated by populate_data.py
+BOOKS_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'books_data.json')
+
+
+class CatalogCache:
+    """Process-level cache of the parsed books_data.json catalog.
+
+    The file is parsed once per worker and kept in memory. Every access
+    compares the file's mtime and size against the cached signature and
+    reloads only when they differ, so edits and BooksListAPI.delete are
+    picked up without a restart.
+
+    The search index is built on a background thread, never by a request:
+    a build takes seconds at 100k titles. search() scans the records until
+    the index for the current catalog is ready.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._books = None
+        self._index = None
+        # Serializes index builds, which can extend self._index in place
+        self._index_lock = threading.Lock()
+        # Records an index build has been started for
+        self._indexing = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def signature(self):
+        """(mtime_ns, size) of the catalog file, or None if it does not exist"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def exists(self):
+        return self.signature() is not None
+
+    def get_books(self):
+        """Return the list of catalog records, or None if the file is missing.
+
+        Raises json.JSONDecodeError / IOError if the file cannot be parsed,
+        matching the behaviour of a direct json.load.
+        """
+        signature = self.signature()
+        if signature is None:
+            with self._lock:
+                self._signature = None
+                self._books = None
+            return None
+
+        books = self._books
+        if books is not None and signature == self._signature:
+            self.hits += 1
+            record_cache_lookup('catalog', 'hit')
+            return books
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._books is not None and signature == self._signature:
+                self.hits += 1
+                record_cache_lookup('catalog', 'hit')
+                return self._books
+
+            self.misses += 1
+            record_cache_lookup('catalog', 'miss')
+            if self._signature is not None:
+                self.reloads += 1
+                record_catalog_reload()
+
+            with open(self.path, 'r') as f:
+                books = json.load(f)
+
+            self._books = books
+            self._signature = signature
+            logger.debug(f"Loaded {len(books)} books from {self.path}")
+
+        if self._index is not None:
+            # The catalog has been searched before; have the new index ready sooner
+            self._start_index_build(books)
+        return books
+
+    def get_search_index(self, books):
+        """Return a TrigramIndex over books, as returned by get_books(), or None until it is built.
+
+        The first call for a new list of records starts the build in the
+        background. When the catalog only grew by appending records, the
+        existing index is extended in place; any other change triggers a
+        full rebuild.
+        """
+        index = self._index
+        if index is not None and index.books is books:
+            return index
+        self._start_index_build(books)
+        return None
+
+    def search(self, books, title=None, authors=None):
+        """Records in books matching title OR authors, through the index once it is ready"""
+        index = self.get_search_index(books)
+        if index is None:
+            return scan(books, title, authors)
+        return index.search(title, authors)
+
+    def _start_index_build(self, books):
+        with self._lock:
+            if self._indexing is books:
+                return
+            self._indexing = books
+        threading.Thread(target=self._build_index, args=(books,), name='catalog-index', daemon=True).start()
+
+    def _build_index(self, books):
+        with self._index_lock:
+            try:
+                if self._books is not books:
+                    # Superseded by a reload, whose own build follows
+                    return
+                index = self._index
+                if index is not None and index.books is books:
+                    return
+                if index is not None and index.is_prefix_of(books):
+                    index.extend(books)
+                    logger.debug(f"Extended catalog search index to {len(books)} books")
+                else:
+                    index = TrigramIndex.build(books)
+                    logger.debug(f"Built catalog search index for {len(books)} books")
+                self._index = index
+            except Exception as e:
+                logger.error(f"Could not build the catalog search index: {str(e)}")
+            finally:
+                with self._lock:
+                    if self._indexing is books:
+                        self._indexing = None
+
+    def invalidate(self):
+        """Drop the cached records so the next access re-reads the file."""
+        with self._lock:
+            self._signature = None
+            self._books = None
+
+    def stats(self):
+        """Counters for this worker, served under 'catalog' by /cache_stats/"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'cached_books': len(self._books) if self._books is not None else 0,
+        }
+
+
+catalog_cache = CatalogCache(BOOKS_DATA_PATH)
+
+
+# Fields shared by books_data.json records and the Book model
+CATALOG_FIELDS = (
+    'book_id', 'title', 'author', 'category', 'subject', 'publisher',
+    'publication_year', 'edition', 'isbn', 'price', 'quantity',
+)
+
+
+def iter_catalog_records(path, chunk_size=1 << 16):
+    """Yield catalog records from a JSON array or NDJSON file one at a time.
+
+    The file is read in fixed-size chunks so memory stays bounded by the
+    largest single record, not the size of the catalog.
+    """
+    with open(path, 'r') as f:
+        first = ''
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                first = char
+                break
+
+        if first == '[':
+            yield from _iter_json_array(f, chunk_size)
+        elif first:
+            # NDJSON: one object per line
+            for line in itertools.chain([first + f.readline()], f):
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _iter_json_array(f, chunk_size):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        # Skip separators between array elements
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+            pos += 1
+
+        if buffer.startswith(']', pos):
+            return
+
+        if pos < len(buffer):
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                continue
+
+        if eof:
+            raise json.JSONDecodeError("Unterminated catalog array", buffer, pos)
+        # Keep only the unparsed tail before reading the next chunk
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
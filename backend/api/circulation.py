@@ -0,0 +1,183 @@
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .constants import BOOK_STATUS_ISSUED, BOOK_STATUS_RETURNED
+from .fines import rent_due, rent_per_day, returned_fine_fields
+from .models import IssuedBooks, Members
+from .serializers import IssuedBooksSerializer
+from .statistics import adjust_statistics
+from .stock import claim_copies, per_key, record_returns, stock_book_id
+from .versioning import bump_data_version
+
+# Loan fields validated by their model field; issued_to_member is checked in bulk
+ISSUE_FIELDS = ('book_id', 'book_title', 'book_author', 'return_date')
+
+
+def _member_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _result(index, book_id, status_code, **extra):
+    return {'index': index, 'book_id': book_id, 'status': status_code, **extra}
+
+
+def _validate_issue(item, member_ids, today):
+    """Return an unsaved loan for one issue operation, or a dict of field errors"""
+    errors = {}
+    values = {}
+    for name in ISSUE_FIELDS:
+        try:
+            values[name] = IssuedBooks._meta.get_field(name).clean(item.get(name), None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if 'return_date' in values and values['return_date'] < today:
+        errors['return_date'] = ['Return date cannot be in the past. Please select a future date.']
+
+    member_pk = _member_pk(item.get('issued_to_member'))
+    if member_pk not in member_ids:
+        errors['issued_to_member'] = [f"Member {item.get('issued_to_member')} does not exist."]
+
+    if errors:
+        return errors
+    return IssuedBooks(issued_to_member_id=member_pk, status=BOOK_STATUS_ISSUED, **values)
+
+
+def issue_batch(items, today=None):
+    """Issue a list of loans together and return one result per item, in order.
+
+    Items are validated up front, then every valid loan is applied in one
+    transaction: one stock claim for all books, one bulk insert and one
+    member counter update, whatever the batch size. Items that fail
+    validation (400) or find no copy left (409) do not abort the rest.
+    """
+    today = today or timezone.now().date()
+    results = [None] * len(items)
+
+    requested = {_member_pk(item.get('issued_to_member')) for item in items if isinstance(item, dict)}
+    requested.discard(None)
+    member_ids = set(Members.objects.filter(pk__in=requested).values_list('pk', flat=True))
+
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _result(index, None, 400, errors={'non_field_errors': ['Expected an object.']})
+            continue
+        loan = _validate_issue(item, member_ids, today)
+        if isinstance(loan, dict):
+            results[index] = _result(index, item.get('book_id'), 400, errors=loan)
+        else:
+            valid.append((index, loan))
+
+    issued = []
+    with transaction.atomic():
+        counts = Counter(stock_book_id(loan.book_id) for _, loan in valid)
+        counts.pop(None, None)
+        granted = claim_copies(counts)
+
+        for index, loan in valid:
+            book_id = stock_book_id(loan.book_id)
+            if book_id is not None:
+                if not granted[book_id]:
+                    results[index] = _result(
+                        index, loan.book_id, 409,
+                        error='No copies available. All copies are currently issued.',
+                    )
+                    continue
+                granted[book_id] -= 1
+            issued.append((index, loan))
+
+        if issued:
+            IssuedBooks.objects.bulk_create([loan for _, loan in issued])
+            per_member = Counter(loan.issued_to_member_id for _, loan in issued)
+            Members.objects.filter(pk__in=per_member).update(
+                books_issued=F('books_issued') + per_key('pk', per_member)
+            )
+            # bulk_create skips the save signals
+            adjust_statistics(issued_books=len(issued))
+            bump_data_version()
+
+    for index, loan in issued:
+        results[index] = _result(index, loan.book_id, 201, data=IssuedBooksSerializer(loan).data)
+    return results
+
+
+class ReturnConflict(Exception):
+    """Some loans in a bulk return were returned by a concurrent request first"""
+
+
+def return_batch(book_ids, today=None):
+    """Return one open loan per entry in book_ids and return one result per entry.
+
+    Uses a fixed number of queries however many books are returned: one
+    locking read of the open loans, then one update each for loans, members
+    and stock. Books with no open loan left get a 404 result.
+
+    Like the single return, only loans still issued are flipped. If a
+    concurrent request returned any of them between the read and the
+    update, the whole batch is rolled back and ReturnConflict is raised, so
+    no member is charged twice; retrying re-reads the open loans.
+    """
+    today = today or timezone.now().date()
+    rate = rent_per_day()
+    results = []
+
+    with transaction.atomic():
+        wanted = {str(book_id) for book_id in book_ids if book_id is not None}
+        open_loans = defaultdict(list)
+        rows = (
+            IssuedBooks.objects.select_for_update()
+            .filter(book_id__in=wanted, status=BOOK_STATUS_ISSUED)
+            .order_by('-pk')
+            .values_list('pk', 'book_id', 'issued_to_member_id', 'issue_date')
+        )
+        for row in rows:
+            open_loans[row[1]].append(row)
+
+        returned = []
+        for index, book_id in enumerate(book_ids):
+            if book_id is None:
+                results.append(_result(index, book_id, 400, error='Book Id is requried'))
+                continue
+            loans = open_loans.get(str(book_id))
+            if not loans:
+                results.append(_result(index, book_id, 404, error='Issued book not found'))
+                continue
+            # Oldest open loan first, as the rows are popped from the end
+            pk, loan_book_id, member_pk, issue_date = loans.pop()
+            rent = rent_due(issue_date, today, rate)
+            returned.append((loan_book_id, member_pk, rent))
+            results.append(_result(index, book_id, 200, loan_id=pk, rent=rent))
+
+        if returned:
+            flipped = IssuedBooks.objects.filter(
+                pk__in=[result['loan_id'] for result in results if result['status'] == 200],
+                status=BOOK_STATUS_ISSUED,
+            ).update(status=BOOK_STATUS_RETURNED, **returned_fine_fields(today))
+            if flipped != len(returned):
+                # Raising inside the atomic block rolls the batch back
+                raise ReturnConflict(
+                    f"{len(returned) - flipped} of {len(returned)} loans were returned by another request"
+                )
+
+            per_member = Counter(member_pk for _, member_pk, _ in returned)
+            rent_per_member = Counter()
+            for _, member_pk, rent in returned:
+                rent_per_member[member_pk] += rent
+            Members.objects.filter(pk__in=per_member).update(
+                books_issued=Greatest(F('books_issued') - per_key('pk', per_member), 0),
+                outstanding_debt=F('outstanding_debt') + per_key('pk', rent_per_member),
+            )
+            record_returns([loan_book_id for loan_book_id, _, _ in returned])
+            # Queryset updates skip the save signals
+            adjust_statistics(issued_books=-len(returned), returned_books=len(returned))
+            bump_data_version()
+
+    return results
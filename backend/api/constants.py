@@ -1,6 +1,8 @@
 # Fine and Fee Configuration
 FINE_PER_DAY = 20  # Fine amount in currency units per day for overdue books
 RENT_COST_PER_DAY = 10  # Rental cost per day for books
+FINE_ACCRUAL_CHUNK_SIZE = 2000  # Loans updated per transaction by accrue_fines
+FINE_SETTINGS_RECHECK_SECONDS = 5  # How long a worker may use its cached rates before checking for changes
 
 # Default Book Values
 DEFAULT_BOOK_RATING = 4.5
@@ -12,9 +14,28 @@ DEFAULT_LANGUAGE_CODE = 'eng'
 # Pagination
 DEFAULT_PAGE_SIZE = 20
 MAX_API_PAGES = 10
+CURSOR_COUNT_CACHE_SECONDS = 60  # How long cursor pagination totals may be stale
+MAX_BULK_ITEMS = 1000  # Operations accepted by one bulk issue/return request
+
+# Member Import
+MEMBER_IMPORT_BATCH_SIZE = 5000  # Members inserted per transaction
+MEMBER_IMPORT_MAX_ERRORS = 1000  # Row errors reported per import; the rest are only counted
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip by streaming exports
+
+# Response Cache
+RESPONSE_CACHE_ALIAS = 'responses'  # Entry in settings.CACHES holding cached GET responses
+RESPONSE_CACHE_BYPASS_PARAM = 'nocache'  # ?nocache=1 skips the lookup and refreshes the entry
 
 # External API Configuration
 FRAPPE_API_URL = "https://frappe.io/api/method/frappe-library"
+FRAPPE_PAGE_SIZE = 20  # Books returned per Frappe API page
+FRAPPE_MAX_CONCURRENCY = 4  # Pages fetched in parallel
+FRAPPE_ASYNC_MAX_CONNECTIONS = 100  # Connection pool shared by all async requests in one worker
+FRAPPE_TIMEOUT_SECONDS = 5  # Per-request connect/read timeout
+FRAPPE_DEADLINE_SECONDS = 10  # Overall budget for one /books/ fallback request
+FRAPPE_CACHE_TTL_SECONDS = 300  # Cached pages are served without a request for this long
+FRAPPE_CACHE_STALE_SECONDS = 3600  # ...then served stale while refreshing for this long
+FRAPPE_CACHE_MAX_BYTES = 50 * 1024 * 1024  # Least recently used pages are evicted past this size
 
 # Book Status Options
 BOOK_STATUS_ISSUED = "Issued"
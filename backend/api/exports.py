@@ -0,0 +1,148 @@
+import csv
+import json
+from datetime import datetime
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .constants import BOOK_STATUS_CHOICES, EXPORT_CHUNK_SIZE
+from .fines import current_fines, overdue_loans
+from .models import IssuedBooks, Members
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+MEMBER_EXPORT_FIELDS = (
+    'member_id', 'member_name', 'member_email', 'member_phone', 'joining_date', 'end_date',
+    'is_active', 'outstanding_debt', 'books_issued', 'last_settlement_date', 'last_settled_amount',
+)
+LOAN_EXPORT_FIELDS = (
+    'id', 'book_id', 'book_title', 'book_author', 'issued_to_member_id',
+    'issue_date', 'return_date', 'overdue', 'fine', 'status',
+)
+# Open loans' fines are computed on read, see fines.current_fines()
+LOAN_EXPORT_COLUMNS = tuple(
+    {'overdue': 'current_overdue', 'fine': 'current_fine'}.get(field, field) for field in LOAN_EXPORT_FIELDS
+)
+OVERDUE_EXPORT_FIELDS = (
+    'id', 'book_id', 'book_title', 'book_author', 'issued_to_member_id', 'member_name',
+    'issue_date', 'return_date', 'overdue_days', 'fine_due',
+)
+
+
+class ExportError(ValueError):
+    """Invalid export parameters, reported as a 400 before any row is streamed"""
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced"""
+
+    def write(self, value):
+        return value
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f"Invalid {name} date. Please use YYYY-MM-DD format.")
+
+
+def _parse_int(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ExportError(f"{name} must be an integer")
+
+
+def _filter_range(queryset, params, field):
+    """Apply the inclusive from/to date filters to field"""
+    start = _parse_date(params, 'from')
+    end = _parse_date(params, 'to')
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lte': end})
+    return queryset
+
+
+def members_export(params):
+    """Members filtered by is_active, member and a joining_date range"""
+    queryset = Members.objects.all()
+    is_active = params.get('is_active')
+    if is_active:
+        if is_active.lower() not in ('true', 'false'):
+            raise ExportError("is_active must be true or false")
+        queryset = queryset.filter(is_active=is_active.lower() == 'true')
+    member = _parse_int(params, 'member')
+    if member is not None:
+        queryset = queryset.filter(member_id=member)
+    queryset = _filter_range(queryset, params, 'joining_date')
+    return queryset.order_by('member_id').values_list(*MEMBER_EXPORT_FIELDS), MEMBER_EXPORT_FIELDS
+
+
+def loans_export(params):
+    """Loans filtered by status, member and an issue_date range"""
+    queryset = current_fines(IssuedBooks.objects.all())
+    loan_status = params.get('status')
+    if loan_status:
+        if loan_status not in dict(BOOK_STATUS_CHOICES):
+            raise ExportError(f"status must be one of: {', '.join(dict(BOOK_STATUS_CHOICES))}")
+        queryset = queryset.filter(status=loan_status)
+    member = _parse_int(params, 'member')
+    if member is not None:
+        queryset = queryset.filter(issued_to_member_id=member)
+    queryset = _filter_range(queryset, params, 'issue_date')
+    return queryset.order_by('pk').values_list(*LOAN_EXPORT_COLUMNS), LOAN_EXPORT_FIELDS
+
+
+def overdue_export(params):
+    """Overdue loans with their current fine, filtered by member and a return_date range"""
+    queryset = overdue_loans(_parse_date(params, 'as_of') or timezone.now().date())
+    member = _parse_int(params, 'member')
+    if member is not None:
+        queryset = queryset.filter(issued_to_member_id=member)
+    queryset = _filter_range(queryset, params, 'return_date').annotate(member_name=F('issued_to_member__member_name'))
+    return queryset.order_by('pk').values_list(*OVERDUE_EXPORT_FIELDS), OVERDUE_EXPORT_FIELDS
+
+
+def iter_export(rows, fields, fmt):
+    """Yield the export one encoded line at a time, header first for CSV"""
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), default=str) + '\n'
+
+
+def export_response(build, params, name):
+    """Build a streaming export for build(params); raises ExportError on bad parameters.
+
+    Rows are read with QuerySet.iterator(), so neither the queryset nor the
+    response body is ever held in memory.
+    """
+    # Not ?format=, which DRF reserves for picking a renderer
+    fmt = params.get('output', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"output must be one of: {', '.join(EXPORT_FORMATS)}")
+    queryset, fields = build(params)
+
+    response = StreamingHttpResponse(
+        iter_export(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), fields, fmt),
+        content_type=EXPORT_FORMATS[fmt],
+    )
+    filename = f"{name}-{timezone.now().date().isoformat()}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
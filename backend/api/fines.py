@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+
+from django.db import connection, transaction
+from django.db.models import Case, DurationField, ExpressionWrapper, F, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, ExtractDay
+from django.utils import timezone
+
+from .constants import (
+    BOOK_STATUS_ISSUED, FINE_ACCRUAL_CHUNK_SIZE, FINE_PER_DAY, FINE_SETTINGS_RECHECK_SECONDS, RENT_COST_PER_DAY,
+)
+from .models import FineAccrual, FineSettings, IssuedBooks
+from .versioning import (
+    FINE_SETTINGS_VERSION, LOANS_VERSION, bump_data_version, current_data_version, request_etag,
+)
+
+logger = logging.getLogger(__name__)
+
+# FineAccrual is a single row
+FINE_ACCRUAL_PK = 1
+
+
+# (version, fine_per_day, rent_cost_per_day) as last loaded by this process
+_rates = None
+_rates_checked_at = 0.0
+_rates_lock = threading.Lock()
+
+
+def _current_rates():
+    """Return (fine_per_day, rent_cost_per_day) from FineSettings, cached per process.
+
+    The cache is checked against the fine settings version at most every
+    FINE_SETTINGS_RECHECK_SECONDS, so most requests make no query at all
+    and new rates reach every worker within that interval.
+    """
+    global _rates, _rates_checked_at
+    now = time.monotonic()
+    with _rates_lock:
+        rates = _rates
+        if rates is not None and now - _rates_checked_at < FINE_SETTINGS_RECHECK_SECONDS:
+            return rates[1:]
+
+    version = current_data_version(FINE_SETTINGS_VERSION)
+    if rates is None or rates[0] != version:
+        fine_settings = FineSettings.objects.first()
+        if fine_settings:
+            rates = (version, fine_settings.fine_per_day, fine_settings.rent_cost_per_day)
+        else:
+            rates = (version, FINE_PER_DAY, RENT_COST_PER_DAY)
+
+    with _rates_lock:
+        _rates = rates
+        _rates_checked_at = now
+    return rates[1:]
+
+
+def invalidate_rates():
+    """Drop this process's cached rates; other workers follow the version bump"""
+    global _rates
+    with _rates_lock:
+        _rates = None
+
+
+def fine_per_day():
+    return _current_rates()[0]
+
+
+def rent_per_day():
+    return _current_rates()[1]
+
+
+def rent_due(issue_date, today, rate):
+    """Rent charged when a loan is returned; a same-day return counts as one day"""
+    rent_days = (today - issue_date).days
+    if issue_date == today:
+        rent_days = 1
+    return rent_days * rate
+
+
+def overdue_days_expression(today):
+    """Whole days between return_date and today, computed by the database"""
+    if connection.vendor == 'sqlite':
+        return Cast(
+            Func(Value(today.isoformat()), function='julianday')
+            - Func(F('return_date'), function='julianday'),
+            IntegerField(),
+        )
+    return ExtractDay(ExpressionWrapper(Value(today) - F('return_date'), output_field=DurationField()))
+
+
+def overdue_loans(today=None):
+    """Issued loans past their return date, annotated with overdue_days and fine_due"""
+    today = today or timezone.now().date()
+    return (
+        IssuedBooks.objects
+        .filter(status=BOOK_STATUS_ISSUED, return_date__lt=today)
+        .annotate(overdue_days=overdue_days_expression(today))
+        .annotate(fine_due=F('overdue_days') * Value(fine_per_day()))
+    )
+
+
+def current_fines(queryset, today=None):
+    """Annotate loans with current_overdue and current_fine as of today.
+
+    Open overdue loans are computed from return_date, since accrue_fines
+    only writes a loan once, when it falls due. Other loans keep their
+    stored values: zero while not yet due, frozen at return afterwards.
+    """
+    today = today or timezone.now().date()
+    days = overdue_days_expression(today)
+    open_overdue = Q(status=BOOK_STATUS_ISSUED, return_date__lt=today)
+    return queryset.annotate(
+        current_overdue=Case(When(open_overdue, then=days), default=F('overdue'), output_field=IntegerField()),
+        current_fine=Case(
+            When(open_overdue, then=days * Value(fine_per_day())), default=F('fine'), output_field=IntegerField(),
+        ),
+    )
+
+
+def returned_fine_fields(today):
+    """UPDATE fields freezing a loan's overdue days and fine as it is returned today"""
+    days = overdue_days_expression(today)
+    overdue = Q(return_date__lt=today)
+    return {
+        'overdue': Case(When(overdue, then=days), default=Value(0), output_field=IntegerField()),
+        'fine': Case(When(overdue, then=days * Value(fine_per_day())), default=Value(0), output_field=IntegerField()),
+    }
+
+
+def fines_etag(request, *args, **kwargs):
+    """etag_func for endpoints showing current fines, which also change with the date and the fine rate"""
+    return request_etag(request, current_data_version(), timezone.now().date(), fine_per_day())
+
+
+def after_return_date(queryset, return_date, pk):
+    """Loans after (return_date, pk) in (return_date, pk) order, a range of the (status, return_date) index"""
+    # The redundant lower bound lets SQLite start the index range at return_date
+    return queryset.filter(
+        Q(return_date__gte=return_date),
+        Q(return_date__gt=return_date) | Q(pk__gt=pk),
+    )
+
+
+def _iter_chunks(queryset, chunk_size):
+    """Yield lists of primary keys, walking the (status, return_date) index in order.
+
+    Keyset pagination on (return_date, pk) keeps every chunk an index range
+    scan, so memory is bounded by chunk_size however many loans match.
+    """
+    last = None
+    while True:
+        chunk = queryset.order_by('return_date', 'pk')
+        if last is not None:
+            chunk = after_return_date(chunk, *last)
+        rows = list(chunk.values_list('return_date', 'pk')[:chunk_size])
+        if not rows:
+            return
+        yield [pk for _, pk in rows]
+        last = rows[-1]
+
+
+def _update_in_chunks(queryset, chunk_size, **updates):
+    processed = 0
+    for pks in _iter_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            processed += IssuedBooks.objects.filter(pk__in=pks).update(**updates)
+    return processed
+
+
+def accrue_fines(today=None, chunk_size=FINE_ACCRUAL_CHUNK_SIZE):
+    """Persist overdue days and fines on the open loans that fell due since the last accrual.
+
+    Only loans due between the high-water mark and today are written, so a
+    daily run costs one index range scan over that day's newly overdue
+    loans, however many were already overdue. Loans are not rewritten as
+    their fine grows: current_fines() computes today's values on read and
+    returns freeze them. The update is idempotent, so a failed run can
+    simply be repeated.
+
+    Returns (rows processed, seconds taken), or None if another run already
+    accrued fines for today.
+    """
+    today = today or timezone.now().date()
+    state, _ = FineAccrual.objects.get_or_create(pk=FINE_ACCRUAL_PK)
+    mark = state.last_accrued_on
+    if mark is not None and mark >= today:
+        return None
+
+    # Claim the run: only one caller moves the mark from its old value
+    claimed = FineAccrual.objects.filter(pk=FINE_ACCRUAL_PK, last_accrued_on=mark).update(last_accrued_on=today)
+    if not claimed:
+        return None
+
+    started = time.monotonic()
+    days = overdue_days_expression(today)
+    newly_overdue = IssuedBooks.objects.filter(status=BOOK_STATUS_ISSUED, return_date__lt=today)
+    if mark is not None:
+        newly_overdue = newly_overdue.filter(return_date__gte=mark)
+    try:
+        processed = _update_in_chunks(newly_overdue, chunk_size, overdue=days, fine=days * Value(fine_per_day()))
+    except Exception:
+        # Hand the day back so the next run repeats the accrual
+        FineAccrual.objects.filter(pk=FINE_ACCRUAL_PK).update(last_accrued_on=mark)
+        raise
+
+    elapsed = time.monotonic() - started
+    FineAccrual.objects.filter(pk=FINE_ACCRUAL_PK).update(
+        last_run_at=timezone.now(), last_run_rows=processed, last_run_seconds=elapsed,
+    )
+    if processed:
+        bump_data_version(LOANS_VERSION)
+    logger.info(f"Accrued fines on {processed} newly overdue loans for {today} in {elapsed:.2f}s")
+    return processed, elapsed
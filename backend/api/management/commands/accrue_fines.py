@@ -0,0 +1,50 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from api.constants import FINE_ACCRUAL_CHUNK_SIZE
+from api.fines import accrue_fines
+
+
+class Command(BaseCommand):
+    help = "Persist overdue days and fines for newly overdue loans (run daily from cron, or with --every)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=FINE_ACCRUAL_CHUNK_SIZE,
+                            help="Loans updated per transaction")
+        parser.add_argument('--date', help="Accrue as of this YYYY-MM-DD date instead of today")
+        parser.add_argument('--every', type=int, metavar='SECONDS',
+                            help="Keep running, checking for a new day every SECONDS")
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("Invalid date format. Please use YYYY-MM-DD format.")
+        if options['chunk_size'] <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        if not options['every']:
+            self._run(today, options['chunk_size'])
+            return
+
+        # Lightweight in-process scheduler; accrue_fines is a no-op until the date changes
+        while True:
+            close_old_connections()
+            self._run(today, options['chunk_size'])
+            time.sleep(options['every'])
+
+    def _run(self, today, chunk_size):
+        result = accrue_fines(today=today, chunk_size=chunk_size)
+        if result is None:
+            self.stdout.write("Fines already accrued for this date")
+            return
+        processed, elapsed = result
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Accrued fines on {processed} loans in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
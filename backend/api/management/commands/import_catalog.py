@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.catalog import CATALOG_FIELDS, iter_catalog_records
+from api.models import Book, BookStock
+from api.search import fts_available, optimize_index
+from api.statistics import adjust_statistics, set_statistics
+from api.versioning import BOOKS_VERSION, bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Stream a JSON array or NDJSON catalog file into the Book table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a books_data.json style JSON array or NDJSON file")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Number of records upserted per transaction")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive")
+
+        started = time.monotonic()
+        imported = 0
+        skipped = 0
+        # Keyed by book_id so duplicates within a batch collapse to the last record
+        batch = {}
+
+        try:
+            for record in iter_catalog_records(path):
+                book = self._build_book(record)
+                if book is None:
+                    skipped += 1
+                    continue
+                batch[book.book_id] = book
+                if len(batch) >= batch_size:
+                    imported += self._flush(list(batch.values()))
+                    batch = {}
+                    self._report(imported, started)
+            if batch:
+                imported += self._flush(list(batch.values()))
+        except FileNotFoundError:
+            raise CommandError(f"Catalog file not found: {path}")
+        except ValueError as e:
+            raise CommandError(f"Invalid catalog file after {imported} records: {e}")
+
+        bump_data_version(BOOKS_VERSION)
+        # Upserts don't tell new rows from updated ones, so recount the catalog once
+        set_statistics(catalog_books=Book.objects.count())
+
+        # Triggers keep the full-text index in sync; merge its segments once at the end
+        if fts_available():
+            optimize_index()
+
+        self._report(imported, started)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} books ({skipped} skipped) in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _build_book(self, record):
+        if not isinstance(record, dict) or record.get('book_id') is None or not record.get('title'):
+            return None
+        values = {field: record.get(field) for field in CATALOG_FIELDS}
+        for field in ('category', 'subject', 'publisher', 'isbn', 'author'):
+            values[field] = values[field] or ''
+        values['isbn'] = str(values['isbn'])
+        values['quantity'] = values['quantity'] or 1
+        return Book(**values)
+
+    @transaction.atomic
+    def _flush(self, batch):
+        """Upsert one batch of books and create stock rows for new titles"""
+        Book.objects.bulk_create(
+            batch,
+            batch_size=len(batch),
+            update_conflicts=True,
+            unique_fields=['book_id'],
+            update_fields=[field for field in CATALOG_FIELDS if field != 'book_id'],
+        )
+
+        # Existing stock rows are left alone so circulation changes are kept
+        book_ids = [book.book_id for book in batch]
+        stocked = set(BookStock.objects.filter(book_id__in=book_ids).values_list('book_id', flat=True))
+        new_stock = [BookStock(book_id=book.book_id, quantity=book.quantity) for book in batch if book.book_id not in stocked]
+        BookStock.objects.bulk_create(new_stock, batch_size=len(batch))
+        adjust_statistics(total_books=len(new_stock))
+        return len(batch)
+
+    def _report(self, imported, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(f"  {imported} records imported ({rate:.0f}/s)")
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.constants import MEMBER_IMPORT_BATCH_SIZE
+from api.member_import import IMPORT_FORMATS, detect_format, import_members, iter_member_rows
+
+
+class Command(BaseCommand):
+    help = "Stream members from a CSV or NDJSON file into the Members table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a header row, or one JSON object per line")
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help="File format (default: from the file extension, else csv)")
+        parser.add_argument('--batch-size', type=int, default=MEMBER_IMPORT_BATCH_SIZE,
+                            help="Number of members inserted per transaction")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size must be positive")
+        fmt = options['format'] or detect_format(path)
+
+        started = time.monotonic()
+
+        def progress(created, failed):
+            elapsed = time.monotonic() - started
+            rate = created / elapsed if elapsed else 0
+            self.stdout.write(f"  {created} members imported, {failed} rejected ({rate:.0f}/s)")
+
+        try:
+            with open(path, 'rb') as f:
+                summary = import_members(iter_member_rows(f, fmt), batch_size=options['batch_size'], progress=progress)
+        except FileNotFoundError:
+            raise CommandError(f"Member file not found: {path}")
+
+        for error in summary['errors']:
+            self.stdout.write(f"  row {error['row']}: {error['errors']}")
+        if summary['errors_truncated']:
+            self.stdout.write(f"  ... {summary['failed'] - len(summary['errors'])} more rejected rows not shown")
+        stopped_at = summary['stopped_at']
+        if stopped_at:
+            raise CommandError(
+                f"Could not read {path} from line {stopped_at['row']}: {stopped_at['error']}. "
+                f"Imported {summary['created']} members before it ({summary['failed']} rejected)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} members ({summary['failed']} rejected) in {summary['seconds']:.1f}s"
+        ))
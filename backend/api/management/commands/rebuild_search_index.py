@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import fts_available, optimize_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 full-text index over the Book table"
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("FTS5 book index not found; run migrate on an SQLite build with FTS5")
+        rebuild_index()
+        optimize_index()
+        self.stdout.write(self.style.SUCCESS("Full-text book index rebuilt"))
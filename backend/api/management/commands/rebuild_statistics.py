@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.statistics import rebuild_statistics, statistics_drift
+
+
+class Command(BaseCommand):
+    help = "Recompute the statistics snapshot served by /statistics/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Only compare the snapshot with the tables and fail on drift")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = statistics_drift()
+            for field, (snapshot, actual) in drift.items():
+                self.stdout.write(f"  {field}: snapshot {snapshot}, actual {actual}")
+            if drift:
+                raise CommandError(f"Statistics snapshot has drifted on {len(drift)} counters")
+            self.stdout.write(self.style.SUCCESS("Statistics snapshot is consistent"))
+            return
+
+        snapshot = rebuild_statistics()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt statistics: {snapshot.total_members} members, {snapshot.issued_books} issued, "
+            f"{snapshot.returned_books} returned, {snapshot.total_books} stocked, {snapshot.catalog_books} catalog books"
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import BookStock
+from api.stock import issued_counts_by_book
+from api.statistics import adjust_statistics
+from api.versioning import BOOKS_VERSION, bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Recompute BookStock.issued_count from issued loans and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        issued = issued_counts_by_book()
+
+        drifted = []
+        seen = set()
+        for stock in BookStock.objects.order_by('book_id').iterator(chunk_size=2000):
+            expected = issued.get(stock.book_id, 0)
+            seen.add(stock.book_id)
+            if stock.issued_count != expected:
+                self.stdout.write(f"  book {stock.book_id}: issued_count {stock.issued_count} -> {expected}")
+                stock.issued_count = expected
+                drifted.append(stock)
+
+        missing = [
+            BookStock(book_id=book_id, quantity=max(1, count), issued_count=count)
+            for book_id, count in issued.items() if book_id not in seen
+        ]
+        for stock in missing:
+            self.stdout.write(f"  book {stock.book_id}: no stock row for {stock.issued_count} issued copies")
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} drifted counters, {len(missing)} missing stock rows (dry run)")
+            return
+
+        BookStock.objects.bulk_update(drifted, ['issued_count'], batch_size=1000)
+        BookStock.objects.bulk_create(missing, batch_size=1000)
+        if drifted or missing:
+            bump_data_version(BOOKS_VERSION)
+            adjust_statistics(total_books=len(missing))
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {len(drifted)} drifted counters, created {len(missing)} missing stock rows"
+        ))
@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ORDERINGS = {
+    'total': lambda shape: shape['total_ms'],
+    'count': lambda shape: shape['count'],
+    'max': lambda shape: shape['max_ms'],
+    'mean': lambda shape: shape['total_ms'] / shape['count'],
+}
+
+
+def _log_files(path):
+    """The log and its rotated backups (path.1, path.2, ...), oldest first"""
+    backups = [name for name in glob.glob(f'{glob.escape(str(path))}.*') if name.rsplit('.', 1)[1].isdigit()]
+    backups.sort(key=lambda name: int(name.rsplit('.', 1)[1]), reverse=True)
+    return backups + [str(path)]
+
+
+def summarize(entries):
+    """Group slow query entries by shape fingerprint"""
+    shapes = {}
+    for entry in entries:
+        shape = shapes.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'shape': entry['shape'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'durations': [],
+            'origins': Counter(),
+            'full_scans': set(),
+            'plan': [],
+        })
+        shape['count'] += 1
+        shape['total_ms'] += entry['duration_ms']
+        shape['max_ms'] = max(shape['max_ms'], entry['duration_ms'])
+        shape['durations'].append(entry['duration_ms'])
+        shape['origins'][entry.get('origin') or 'unknown'] += 1
+        shape['full_scans'].update(entry.get('full_scans') or [])
+        if entry.get('plan'):
+            # Entries are read oldest first, so this keeps the latest plan
+            shape['plan'] = entry['plan']
+
+    for shape in shapes.values():
+        durations = sorted(shape.pop('durations'))
+        shape['p95_ms'] = durations[int(len(durations) * 0.95)] if len(durations) > 1 else durations[0]
+        shape['full_scans'] = sorted(shape['full_scans'])
+    return list(shapes.values())
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow query log into the query shapes costing the most time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG_PATH,
+                            help="Slow query log to read, together with its rotated backups")
+        parser.add_argument('--top', type=int, default=10, help="Number of query shapes to show")
+        parser.add_argument('--order', choices=ORDERINGS, default='total',
+                            help="Rank shapes by total, count, max or mean time")
+        parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+
+    def handle(self, *args, **options):
+        files = [name for name in _log_files(options['log']) if os.path.exists(name)]
+        if not files:
+            raise CommandError(f"No slow query log at {options['log']}")
+
+        entries = []
+        unreadable = 0
+        for name in files:
+            with open(name, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        entry = None
+                    if not isinstance(entry, dict) or 'fingerprint' not in entry or 'duration_ms' not in entry:
+                        unreadable += 1
+                        continue
+                    entries.append(entry)
+
+        shapes = sorted(summarize(entries), key=ORDERINGS[options['order']], reverse=True)[:options['top']]
+
+        if options['json']:
+            for shape in shapes:
+                shape['origins'] = dict(shape['origins'].most_common())
+            self.stdout.write(json.dumps(shapes, indent=2))
+            return
+
+        self.stdout.write(
+            f"{len(entries)} slow queries in {len(files)} files"
+            + (f", {unreadable} unreadable lines" if unreadable else "")
+            + f"; top {len(shapes)} shapes by {options['order']} time\n"
+        )
+        for rank, shape in enumerate(shapes, start=1):
+            self.stdout.write(self.style.WARNING(
+                f"{rank}. [{shape['fingerprint']}] {shape['count']} calls, {shape['total_ms']:.1f}ms total, "
+                f"mean {shape['total_ms'] / shape['count']:.1f}ms, p95 {shape['p95_ms']:.1f}ms, "
+                f"max {shape['max_ms']:.1f}ms"
+            ))
+            self.stdout.write(f"   {shape['shape']}")
+            origins = ', '.join(f"{origin} ({count})" for origin, count in shape['origins'].most_common(3))
+            self.stdout.write(f"   from: {origins}")
+            if shape['full_scans']:
+                self.stdout.write(self.style.ERROR(f"   full scans: {', '.join(shape['full_scans'])}"))
+            for detail in shape['plan']:
+                self.stdout.write(f"   plan: {detail}")
+            self.stdout.write("")
@@ -0,0 +1,193 @@
+import codecs
+import csv
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .constants import MEMBER_IMPORT_BATCH_SIZE, MEMBER_IMPORT_MAX_ERRORS
+from .models import Members
+from .statistics import adjust_statistics
+from .versioning import MEMBERS_VERSION, bump_data_version
+
+# Columns read from an import file; anything else is ignored
+MEMBER_IMPORT_FIELDS = ('member_name', 'member_email', 'member_phone', 'end_date', 'is_active', 'outstanding_debt')
+REQUIRED_FIELDS = ('member_name', 'member_email', 'member_phone', 'end_date')
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0'}
+
+
+def detect_format(filename, default='csv'):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if extension == '.csv':
+        return 'csv'
+    return default
+
+
+class MemberFileError(ValueError):
+    """The import file cannot be read from row onwards, e.g. an undecodable CSV header or a malformed CSV line"""
+
+    def __init__(self, row, message):
+        super().__init__(f"line {row}: {message}")
+        self.row = row
+        self.message = message
+
+
+def _decoded_lines(stream, bad_lines):
+    """Decode a binary stream as UTF-8 one line at a time, dropping a leading BOM.
+
+    A line that is not valid UTF-8 is decoded with replacement characters
+    and its number added to bad_lines, so only that row is rejected.
+    """
+    for line_number, raw in enumerate(stream, start=1):
+        if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield raw.decode('utf-8', errors='replace')
+
+
+def iter_member_rows(stream, fmt):
+    """Yield (row_number, record, error) from a binary stream, one row at a time.
+
+    Rows that cannot be decoded or parsed come back with record None and an
+    error message, so one bad line does not stop the import. Raises
+    MemberFileError when the rest of the file cannot be read at all.
+    """
+    bad_lines = set()
+    lines = _decoded_lines(stream, bad_lines)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            if reader.fieldnames is not None and 1 in bad_lines:
+                raise MemberFileError(1, "header row is not valid UTF-8")
+            last_line = reader.line_num
+            for record in reader:
+                # A quoted field may span several lines
+                span = range(last_line + 1, reader.line_num + 1)
+                last_line = reader.line_num
+                if bad_lines and any(line in bad_lines for line in span):
+                    bad_lines.difference_update(span)
+                    yield reader.line_num, None, "Row is not valid UTF-8"
+                    continue
+                yield reader.line_num, record, None
+        except csv.Error as e:
+            # line_num already counts the line the reader choked on
+            raise MemberFileError(reader.line_num, str(e)) from e
+        return
+
+    for row_number, line in enumerate(lines, start=1):
+        if row_number in bad_lines:
+            bad_lines.discard(row_number)
+            yield row_number, None, "Row is not valid UTF-8"
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+
+
+def build_member(record):
+    """Return an unsaved Members row, or a dict of field errors"""
+    if not isinstance(record, dict):
+        return {'non_field_errors': ['Expected an object.']}
+
+    values = {}
+    errors = {}
+    for name in MEMBER_IMPORT_FIELDS:
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            if name in REQUIRED_FIELDS:
+                errors[name] = ['This field is required.']
+            continue
+        if name == 'is_active' and isinstance(value, str):
+            # CSV has no booleans; accept the usual spellings
+            lowered = value.lower()
+            value = True if lowered in TRUE_VALUES else False if lowered in FALSE_VALUES else value
+        try:
+            values[name] = Members._meta.get_field(name).clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+
+    return errors or Members(**values)
+
+
+@transaction.atomic
+def _flush(batch):
+    Members.objects.bulk_create(batch)
+    # bulk_create skips the save signals
+    adjust_statistics(
+        total_members=len(batch),
+        active_members=sum(1 for member in batch if member.is_active),
+    )
+    bump_data_version(MEMBERS_VERSION)
+    return len(batch)
+
+
+def import_members(rows, batch_size=MEMBER_IMPORT_BATCH_SIZE, max_errors=MEMBER_IMPORT_MAX_ERRORS, progress=None):
+    """Validate and insert members from (row_number, record, error) rows.
+
+    Valid rows are inserted with bulk_create, one transaction per batch, so
+    memory is bounded by batch_size and invalid rows never abort the file.
+    Only the first max_errors row errors are kept in the summary.
+    progress, if given, is called with (created, failed) after every batch.
+
+    If the file stops being readable, every valid row before that point is
+    still inserted and the summary's stopped_at gives the first unread row
+    and the reason, so the rest can be fixed and imported on its own.
+    stopped_at is None when the whole file was read.
+    """
+    started = time.monotonic()
+    created = 0
+    failed = 0
+    errors = []
+    batch = []
+    stopped_at = None
+
+    try:
+        for row_number, record, error in rows:
+            member = build_member(record) if error is None else {'non_field_errors': [error]}
+            if isinstance(member, dict):
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({'row': row_number, 'errors': member})
+                continue
+
+            batch.append(member)
+            if len(batch) >= batch_size:
+                created += _flush(batch)
+                batch = []
+                if progress:
+                    progress(created, failed)
+    except MemberFileError as e:
+        # Earlier batches are committed; commit the rest of the rows read so
+        # far too, so everything before stopped_at is imported exactly once
+        stopped_at = {'row': e.row, 'error': e.message}
+
+    if batch:
+        created += _flush(batch)
+        if progress:
+            progress(created, failed)
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'stopped_at': stopped_at,
+        'seconds': round(time.monotonic() - started, 3),
+    }
@@ -0,0 +1,107 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+# Under gunicorn the workers write to per-process files in this directory
+# (see gunicorn.conf.py) and a scrape from any worker sums them all
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+REQUESTS = Counter(
+    'libdesk_requests', "Requests handled, by view, method and status code",
+    ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'libdesk_request_duration_seconds', "Time from the first middleware to the response, by view",
+    ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'libdesk_request_queries', "SQL queries run per request, by view",
+    ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'libdesk_cache_lookups', "Response cache, Frappe page cache and catalog cache lookups, by scope and outcome",
+    ['scope', 'outcome'],
+)
+UPSTREAM_LATENCY_SAVED = Counter(
+    'libdesk_upstream_latency_saved_seconds',
+    "Frappe API time avoided by serving pages from the page cache, at each page's recorded fetch latency",
+)
+CATALOG_RELOADS = Counter(
+    'libdesk_catalog_reloads', "Times a worker re-read books_data.json after the file changed",
+)
+UPSTREAM_ERRORS = Counter(
+    'libdesk_upstream_errors', "Failed Frappe API fetches, by kind of failure",
+    ['kind'],
+)
+
+
+def view_label(request):
+    """View class or function name for the matched URL; bounded, unlike the path"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    return getattr(func, 'view_class', func).__name__
+
+
+def record_request(request, status_code, seconds, queries):
+    view = view_label(request)
+    method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+    REQUESTS.labels(view, method, str(status_code)).inc()
+    REQUEST_LATENCY.labels(view, method).observe(seconds)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def record_cache_lookup(scope, outcome):
+    CACHE_LOOKUPS.labels(scope, outcome).inc()
+
+
+def record_upstream_latency_saved(seconds):
+    UPSTREAM_LATENCY_SAVED.inc(seconds)
+
+
+def record_catalog_reload():
+    CATALOG_RELOADS.inc()
+
+
+def record_upstream_error(kind):
+    UPSTREAM_ERRORS.labels(kind).inc()
+
+
+def _hit_ratios(families):
+    """Hit ratio per cache scope, derived from the lookup counters at scrape time"""
+    counts = {}
+    for family in families:
+        if family.name != 'libdesk_cache_lookups':
+            continue
+        for sample in family.samples:
+            if sample.name.endswith('_total'):
+                scope_counts = counts.setdefault(sample.labels['scope'], {})
+                scope_counts[sample.labels['outcome']] = sample.value
+
+    ratio = GaugeMetricFamily(
+        'libdesk_cache_hit_ratio', "Hits over hits plus misses since start, by cache scope", labels=['scope'],
+    )
+    for scope, outcomes in sorted(counts.items()):
+        lookups = outcomes.get('hit', 0) + outcomes.get('miss', 0)
+        if lookups:
+            ratio.add_metric([scope], outcomes.get('hit', 0) / lookups)
+    return ratio
+
+
+class ScrapeRegistry:
+    """Every worker's metrics plus the derived hit ratios, for generate_latest()"""
+
+    def collect(self):
+        if os.environ.get(MULTIPROCESS_DIR_ENV):
+            source = CollectorRegistry()
+            multiprocess.MultiProcessCollector(source)
+        else:
+            source = REGISTRY
+        families = list(source.collect())
+        return families + [_hit_ratios(families)]
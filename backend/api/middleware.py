@@ -0,0 +1,145 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import record_request
+from .slow_queries import reset_current_request, set_current_request
+from .timing import RequestTiming, collect_queries, current_timing, start_timing, stop_collecting, stop_timing
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI.
+
+    Django passes an async get_response under ASGI; __call__ then returns
+    the coroutine from __acall__, so async views such as /books/async/ are
+    not pushed through a worker thread. Subclasses put their work around
+    the call in before() and after().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.before(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(state)
+        return self.after(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.before(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(state)
+        return self.after(request, response, state)
+
+    def before(self, request):
+        """Called before the rest of the stack; returns state for finish() and after()"""
+        return None
+
+    def finish(self, state):
+        """Called once the rest of the stack returns or raises"""
+
+    def after(self, request, response, state):
+        return response
+
+
+class ServerTimingMiddleware(AsyncCapableMiddleware):
+    """Add Server-Timing and X-Query-Count headers to every response.
+
+    Reports the query count and SQL time over every database alias, the
+    spans recorded with api.timing.span(), the time spent rendering the
+    response body, and the total. Django drops the middleware at startup
+    unless settings.SERVER_TIMING_ENABLED is set, so it costs nothing when
+    switched off.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def before(self, request):
+        return start_timing()
+
+    def finish(self, state):
+        stop_timing(state[1])
+
+    def after(self, request, response, state):
+        timing = state[0]
+        finished = time.perf_counter()
+        if timing.view_finished is not None:
+            timing.add('render', finished - timing.view_finished)
+
+        entries = [f'db;dur={timing.sql_seconds * 1000:.1f};desc="{timing.queries} queries"']
+        for name, (seconds, count) in timing.spans.items():
+            entry = f'{name};dur={seconds * 1000:.1f}'
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        entries.append(f'total;dur={(finished - timing.started) * 1000:.1f}')
+
+        response['Server-Timing'] = ', '.join(entries)
+        response['X-Query-Count'] = str(timing.queries)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook; the rest is render time
+        timing = current_timing()
+        if timing is not None:
+            timing.view_finished = time.perf_counter()
+        return response
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Record every request's view, status, latency and query count for /metrics.
+
+    Dropped at startup when settings.METRICS_ENABLED is False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def before(self, request):
+        # Only counts queries; spans belong to ServerTimingMiddleware
+        timing = RequestTiming()
+        return timing, collect_queries(timing)
+
+    def finish(self, state):
+        stop_collecting(state[1])
+
+    def after(self, request, response, state):
+        timing = state[0]
+        record_request(request, response.status_code, time.perf_counter() - timing.started, timing.queries)
+        return response
+
+
+class SlowQueryMiddleware(AsyncCapableMiddleware):
+    """Let the slow query log name the view behind each query.
+
+    Dropped at startup unless settings.SLOW_QUERY_LOG_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def before(self, request):
+        return set_current_request(request)
+
+    def finish(self, state):
+        reset_current_request(state)
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_fine_settings_and_updates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.IntegerField(unique=True)),
+                ('title', models.CharField(db_index=True, max_length=255)),
+                ('author', models.CharField(db_index=True, max_length=255)),
+                ('category', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('publisher', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('publication_year', models.IntegerField(blank=True, null=True)),
+                ('edition', models.PositiveIntegerField(blank=True, null=True)),
+                ('isbn', models.CharField(blank=True, max_length=20)),
+                ('price', models.PositiveIntegerField(blank=True, null=True)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
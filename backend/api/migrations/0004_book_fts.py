@@ -0,0 +1,77 @@
+# FTS5 full-text index over Book title, author, subject and publisher.
+# The index is an external-content table kept in sync by triggers, so
+# import_catalog upserts and BooksListAPI.delete update it automatically.
+
+from django.db import migrations
+
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_book_fts USING fts5(
+        title, author, subject, publisher,
+        content='api_book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_book_fts_ai AFTER INSERT ON api_book BEGIN
+        INSERT INTO api_book_fts(rowid, title, author, subject, publisher)
+        VALUES (new.id, new.title, new.author, new.subject, new.publisher);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_book_fts_ad AFTER DELETE ON api_book BEGIN
+        INSERT INTO api_book_fts(api_book_fts, rowid, title, author, subject, publisher)
+        VALUES ('delete', old.id, old.title, old.author, old.subject, old.publisher);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_book_fts_au AFTER UPDATE ON api_book BEGIN
+        INSERT INTO api_book_fts(api_book_fts, rowid, title, author, subject, publisher)
+        VALUES ('delete', old.id, old.title, old.author, old.subject, old.publisher);
+        INSERT INTO api_book_fts(rowid, title, author, subject, publisher)
+        VALUES (new.id, new.title, new.author, new.subject, new.publisher);
+    END
+    """,
+    "INSERT INTO api_book_fts(api_book_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_book_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ad",
+    "DROP TRIGGER IF EXISTS api_book_fts_ai",
+    "DROP TABLE IF EXISTS api_book_fts",
+]
+
+
+def _run(schema_editor, statements):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        except Exception as e:
+            # SQLite builds without FTS5 keep working with the linear scan
+            if 'fts5' not in str(e).lower():
+                raise
+
+
+def create_fts(apps, schema_editor):
+    _run(schema_editor, CREATE_SQL)
+
+
+def drop_fts(apps, schema_editor):
+    _run(schema_editor, DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_book'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1 on 2026-10-18 12:13
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_issued_count(apps, schema_editor):
+    BookStock = apps.get_model('api', 'BookStock')
+    IssuedBooks = apps.get_model('api', 'IssuedBooks')
+
+    issued = {}
+    rows = IssuedBooks.objects.filter(status='Issued').values('book_id').annotate(n=Count('id'))
+    for row in rows:
+        try:
+            issued[int(row['book_id'])] = row['n']
+        except (TypeError, ValueError):
+            continue
+
+    stocks = list(BookStock.objects.filter(book_id__in=issued.keys()).order_by('book_id', 'pk'))
+    seen = set()
+    for stock in stocks:
+        # Only the first row per book carries the counter
+        if stock.book_id not in seen:
+            stock.issued_count = issued[stock.book_id]
+            seen.add(stock.book_id)
+    BookStock.objects.bulk_update(stocks, ['issued_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_book_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookstock',
+            name='issued_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='bookstock',
+            name='book_id',
+            field=models.IntegerField(db_index=True),
+        ),
+        migrations.RunPython(populate_issued_count, migrations.RunPython.noop),
+    ]
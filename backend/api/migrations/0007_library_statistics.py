@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_members', models.IntegerField(default=0)),
+                ('active_members', models.IntegerField(default=0)),
+                ('issued_books', models.IntegerField(default=0)),
+                ('returned_books', models.IntegerField(default=0)),
+                ('total_books', models.IntegerField(default=0)),
+                ('catalog_books', models.IntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Library Statistics',
+            },
+        ),
+    ]
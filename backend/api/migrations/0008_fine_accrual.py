@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_library_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FineAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_accrued_on', models.DateField(blank=True, null=True)),
+            ],
+        ),
+    ]
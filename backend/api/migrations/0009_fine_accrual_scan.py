@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_fine_accrual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fineaccrual',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fineaccrual',
+            name='last_run_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fineaccrual',
+            name='last_run_seconds',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbooks',
+            index=models.Index(fields=['status', 'return_date'], name='issued_status_return_idx'),
+        ),
+    ]
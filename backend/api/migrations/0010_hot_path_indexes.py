@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_book_stock(apps, schema_editor):
+    """Keep the oldest stock row per book, which is the one the views already used"""
+    BookStock = apps.get_model('api', 'BookStock')
+    duplicated = (
+        BookStock.objects.values('book_id')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicated.iterator():
+        BookStock.objects.filter(book_id=row['book_id']).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_fine_accrual_scan'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookstock',
+            name='book_id',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='issuedbooks',
+            index=models.Index(fields=['book_id', 'status'], name='issued_book_status_idx'),
+        ),
+        migrations.RunPython(dedupe_book_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookstock',
+            constraint=models.UniqueConstraint(fields=('book_id',), name='bookstock_book_id_unique'),
+        ),
+    ]
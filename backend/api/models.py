@@ -26,6 +26,13 @@ class Members(models.Model):
     last_settlement_date = models.DateField(blank=True, null=True)
     last_settled_amount = models.IntegerField(default=0)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so statistics signals can tell what a save changed
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        return instance
+
 class IssuedBooks(models.Model):
     book_id = models.CharField(max_length=50)  # Support both string and numeric IDs
     book_title = models.CharField(max_length=255)
@@ -37,7 +44,87 @@ class IssuedBooks(models.Model):
     fine = models.IntegerField(default=0)
     status = models.CharField(max_length=50, choices=BOOK_STATUS_CHOICES, default='Issued')
 
+    class Meta:
+        indexes = [
+            # Availability and return lookups: open loans of one book
+            models.Index(fields=['book_id', 'status'], name='issued_book_status_idx'),
+            # Overdue scans: open loans by due date
+            models.Index(fields=['status', 'return_date'], name='issued_status_return_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so statistics and stock signals can tell what a save changed
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_book_id = instance.__dict__.get('book_id')
+        return instance
+
 
 class BookStock(models.Model):
     book_id = models.IntegerField()
-    quantity = models.PositiveIntegerField(default=0)
\ No newline at end of file
+    quantity = models.PositiveIntegerField(default=0)
+    # Copies currently on loan, maintained by the bulk issue/return paths and api.signals
+    issued_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book_id'], name='bookstock_book_id_unique'),
+        ]
+
+    @property
+    def available_count(self):
+        return max(0, self.quantity - self.issued_count)
+
+
+class Book(models.Model):
+    """Catalog entry, mirroring the records in books_data.json"""
+    book_id = models.IntegerField(unique=True)
+    title = models.CharField(max_length=255, db_index=True)
+    author = models.CharField(max_length=255, db_index=True)
+    category = models.CharField(max_length=100, blank=True, db_index=True)
+    subject = models.CharField(max_length=255, blank=True)
+    publisher = models.CharField(max_length=255, blank=True, db_index=True)
+    publication_year = models.IntegerField(blank=True, null=True)
+    edition = models.PositiveIntegerField(blank=True, null=True)
+    isbn = models.CharField(max_length=20, blank=True)
+    price = models.PositiveIntegerField(blank=True, null=True)
+    quantity = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.book_id}: {self.title}"
+
+
+class DataVersion(models.Model):
+    """Monotonic counter bumped on every write that changes what the read endpoints return"""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+
+class LibraryStatistics(models.Model):
+    """Single-row snapshot served by StatisticsAPI, kept current by api/statistics.py"""
+    total_members = models.IntegerField(default=0)
+    active_members = models.IntegerField(default=0)
+    issued_books = models.IntegerField(default=0)
+    returned_books = models.IntegerField(default=0)
+    total_books = models.IntegerField(default=0)
+    catalog_books = models.IntegerField(default=0)
+    rebuilt_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name_plural = "Library Statistics"
+
+
+class FineAccrual(models.Model):
+    """Single row recording when overdue fines were last written to IssuedBooks.
+
+    last_accrued_on is the high-water mark: every open loan due before it
+    has been written once, when it fell due. IssuedBooks.overdue and fine
+    therefore hold only that first day's values while a loan is open; the
+    API, exports and admin show fines.current_fines() instead, and a return
+    stores the final values.
+    """
+    last_accrued_on = models.DateField(blank=True, null=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_run_rows = models.IntegerField(default=0)
+    last_run_seconds = models.FloatField(default=0)
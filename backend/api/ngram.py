@@ -0,0 +1,166 @@
+from array import array
+from functools import reduce
+from operator import and_
+
+# Fields of a catalog record indexed for substring search, keyed by the
+# BooksListAPI query parameter that searches them
+SEARCH_FIELDS = {
+    'title': 'title',
+    'authors': 'author',
+}
+
+NGRAM_SIZE = 3
+# Posting lists holding at least 1/BITMAP_DENSITY of the records also get an
+# int bitmap, which is then no larger than their array of 4-byte positions
+BITMAP_DENSITY = 32
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """In-memory trigram inverted index over catalog records.
+
+    Each field keeps a dict of trigram -> sorted array of record positions.
+    A substring query starts from its rarest trigram's posting list instead
+    of scanning every record. When that list is long, the query's dense
+    lists are intersected as int bitmaps, one C-level AND each, so only
+    records holding every trigram are visited. Candidates are confirmed
+    with a real substring check so results keep the `in` semantics of the
+    original scan.
+    """
+
+    def __init__(self):
+        self.books = []
+        self._postings = {field: {} for field in SEARCH_FIELDS.values()}
+        # trigram -> bitmap of record positions, for the dense posting lists
+        self._bitmaps = {field: {} for field in SEARCH_FIELDS.values()}
+        # Lowercased field values, used to confirm candidates
+        self._texts = {field: [] for field in SEARCH_FIELDS.values()}
+
+    @classmethod
+    def build(cls, books):
+        index = cls()
+        index.extend(books)
+        return index
+
+    def extend(self, books):
+        """Index the records of books beyond those already indexed.
+
+        books must start with the records indexed so far (see is_prefix_of).
+        New positions are larger than all existing ones, so appending keeps
+        every posting list sorted without a re-sort.
+        """
+        start = len(self.books)
+        pending = {field: {} for field in self._postings}
+        for doc_id in range(start, len(books)):
+            book = books[doc_id]
+            for field, grams in pending.items():
+                text = _field_text(book, field)
+                self._texts[field].append(text)
+                for gram in _ngrams(text):
+                    grams.setdefault(gram, []).append(doc_id)
+
+        dense = len(books) // BITMAP_DENSITY
+        for field, grams in pending.items():
+            postings = self._postings[field]
+            bitmaps = self._bitmaps[field]
+            for gram, doc_ids in grams.items():
+                if gram in postings:
+                    postings[gram].extend(doc_ids)
+                else:
+                    postings[gram] = array('I', doc_ids)
+                if gram in bitmaps:
+                    bitmaps[gram] |= _bitmap(doc_ids, start) << start
+                elif len(postings[gram]) >= dense:
+                    bitmaps[gram] = _bitmap(postings[gram])
+
+        self.books = books
+
+    def is_prefix_of(self, books):
+        return len(books) >= len(self.books) and books[:len(self.books)] == self.books
+
+    def _search_field(self, books, field, query):
+        query = query.lower()
+        texts = self._texts[field]
+        if len(query) < NGRAM_SIZE:
+            # Too short to use the index
+            return [i for i in range(len(books)) if query in texts[i]]
+
+        postings = self._postings[field]
+        bitmaps = self._bitmaps[field]
+        grams = _ngrams(query)
+        candidates = None
+        for gram in grams:
+            doc_ids = postings.get(gram)
+            if doc_ids is None:
+                return []
+            if candidates is None or len(doc_ids) < len(candidates):
+                candidates = doc_ids
+
+        # The rarest list is dense only if every list is. Confirming a short
+        # list costs less than extracting positions from a bitmap.
+        if len(grams) > 1 and all(gram in bitmaps for gram in grams):
+            common = reduce(and_, (bitmaps[gram] for gram in grams))
+            if common.bit_count() * 2 < len(candidates):
+                candidates = _bit_positions(common)
+
+        # Positions past the snapshot belong to a concurrent extend()
+        limit = len(books)
+        return [doc_id for doc_id in candidates if doc_id < limit and query in texts[doc_id]]
+
+    def search(self, title=None, authors=None):
+        """Return the records matching title OR authors, in catalog order"""
+        books = self.books
+        matches = None
+        for param, query in (('title', title), ('authors', authors)):
+            if not query:
+                continue
+            found = self._search_field(books, SEARCH_FIELDS[param], query)
+            matches = found if matches is None else sorted(set(matches).union(found))
+        if matches is None:
+            return books
+        return [books[doc_id] for doc_id in matches]
+
+    def memory_postings(self):
+        """Number of postings held, for sizing the index"""
+        return sum(len(p) for postings in self._postings.values() for p in postings.values())
+
+
+def _bitmap(doc_ids, offset=0):
+    """int with bit (doc_id - offset) set for each of the sorted doc_ids"""
+    if not doc_ids:
+        return 0
+    bits = bytearray(((doc_ids[-1] - offset) >> 3) + 1)
+    for doc_id in doc_ids:
+        doc_id -= offset
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _bit_positions(bitmap):
+    """Positions of the set bits, in increasing order"""
+    # Least significant bit first, without the '0b' prefix
+    bits = bin(bitmap)[:1:-1]
+    positions = []
+    position = bits.find('1')
+    while position != -1:
+        positions.append(position)
+        position = bits.find('1', position + 1)
+    return positions
+
+
+def scan(books, title=None, authors=None):
+    """Records matching title OR authors by a linear scan, with the same results as TrigramIndex.search"""
+    queries = [
+        (SEARCH_FIELDS[param], query.lower())
+        for param, query in (('title', title), ('authors', authors)) if query
+    ]
+    if not queries:
+        return books
+    return [book for book in books if any(query in _field_text(book, field) for field, query in queries)]
+
+
+def _field_text(book, field):
+    return (book.get(field) or '').lower()
@@ -0,0 +1,96 @@
+import base64
+import json
+
+from django.core.cache import cache
+
+from .constants import CURSOR_COUNT_CACHE_SECONDS
+
+
+def encode_cursor(direction, value):
+    payload = json.dumps({'d': direction, 'v': value}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, value) for a cursor, or ('after', None) for an empty one.
+
+    Raises ValueError for cursors that were not produced by encode_cursor.
+    """
+    if not cursor:
+        return 'after', None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, value = payload['d'], payload['v']
+    except (TypeError, KeyError, json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if direction not in ('after', 'before') or not isinstance(value, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return direction, value
+
+
+def encode_keyset(values):
+    """Cursor for the position after a row in a multi-column ordering, e.g. (return_date, pk)"""
+    payload = json.dumps(list(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_keyset(cursor, size):
+    """Return the size values encoded by encode_keyset, or None for an empty cursor.
+
+    Raises ValueError for cursors that were not produced by encode_keyset.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def cursor_paginate(queryset, cursor, page_size):
+    """Fetch one page of queryset keyed on its primary key.
+
+    Each page is a single indexed range query (pk > value or pk < value)
+    with LIMIT page_size + 1, so the cost does not depend on how deep the
+    page is. Returns (rows, next_cursor, prev_cursor).
+    """
+    pk = queryset.model._meta.pk.attname
+    direction, value = decode_cursor(cursor)
+
+    if direction == 'before':
+        rows = list(queryset.filter(**{f'{pk}__lt': value}).order_by(f'-{pk}')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+        prev_cursor = encode_cursor('before', rows[0].pk) if has_more else None
+        next_cursor = encode_cursor('after', rows[-1].pk) if rows else encode_cursor('after', value - 1)
+    else:
+        if value is not None:
+            queryset = queryset.filter(**{f'{pk}__gt': value})
+        rows = list(queryset.order_by(pk)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor('after', rows[-1].pk) if has_more else None
+        prev_cursor = None
+        if value is not None:
+            prev_cursor = encode_cursor('before', rows[0].pk) if rows else encode_cursor('before', value + 1)
+
+    return rows, next_cursor, prev_cursor
+
+
+def cached_count(queryset, key):
+    """Row count for queryset, cached for CURSOR_COUNT_CACHE_SECONDS.
+
+    Good enough for "about N results" displays without a COUNT(*) per page.
+    """
+    cache_key = f'cursor_count:{key}'
+    total = cache.get(cache_key)
+    if total is None:
+        total = queryset.count()
+        cache.set(cache_key, total, CURSOR_COUNT_CACHE_SECONDS)
+    return total
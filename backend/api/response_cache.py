@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from collections import defaultdict
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .catalog import catalog_cache
+from .constants import RESPONSE_CACHE_ALIAS, RESPONSE_CACHE_BYPASS_PARAM
+from .fines import fine_per_day
+from .metrics import record_cache_lookup
+from .models import Book
+from .timing import span
+from .versioning import data_versions
+
+CACHE_STATUS_HEADER = 'X-Cache'
+
+_STAT_KEYS = {'hit': 'hits', 'miss': 'misses', 'bypass': 'bypasses'}
+
+# {scope: {'hits': n, 'misses': n, 'bypasses': n}} for this process
+_counters = defaultdict(lambda: {'hits': 0, 'misses': 0, 'bypasses': 0})
+_counters_lock = threading.Lock()
+
+
+def _count(scope, outcome):
+    with _counters_lock:
+        _counters[scope][_STAT_KEYS[outcome]] += 1
+    # Summed over every worker in api/metrics.py
+    record_cache_lookup(scope, outcome)
+
+
+def response_cache_stats():
+    """Per-endpoint hit, miss and bypass counts for this worker process"""
+    with _counters_lock:
+        stats = {scope: dict(counts) for scope, counts in _counters.items()}
+    for counts in stats.values():
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 3) if lookups else None
+    return stats
+
+
+def catalog_state(request):
+    """State for endpoints that serve the local catalog.
+
+    Returns None, so nothing is cached, when books come from the Frappe API;
+    those pages have their own cache in api/upstream_cache.py.
+    """
+    signature = catalog_cache.signature()
+    if signature is None and not Book.objects.exists():
+        return None
+    return (signature,)
+
+
+def catalog_signature(request):
+    return (catalog_cache.signature(),)
+
+
+def overdue_state(request):
+    """Overdue days and fines change with the date and the fine rate, not only with writes"""
+    return (timezone.now().date(), fine_per_day())
+
+
+def _cache_key(scope, request, tokens):
+    # Parameter order and the bypass switch do not change the response
+    query = sorted(
+        (name, value)
+        for name, values in request.GET.lists() if name != RESPONSE_CACHE_BYPASS_PARAM
+        for value in values
+    )
+    parts = [request.path, urlencode(query), *map(str, tokens)]
+    return f"response:{scope}:{hashlib.sha1('|'.join(parts).encode()).hexdigest()}"
+
+
+def cache_response(scope, *versions, state=None):
+    """Cache a public GET handler's 200 responses until a write bumps one of versions.
+
+    The key covers the path, the normalized query string, the current value
+    of each named data version and the tokens returned by state(request),
+    so a write makes the old entries unreachable in every worker at once.
+    state may return None to skip the cache for that request. Send
+    ?nocache=1 to skip the lookup and refresh the entry.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+
+            # Versions are read before the view runs, so a write committed in
+            # between can only leave newer data under the older key
+            tokens = state(request) if state else ()
+            if tokens is None:
+                return view_func(request, *args, **kwargs)
+            key = _cache_key(scope, request, (*data_versions(*versions), *tokens))
+            cache = caches[RESPONSE_CACHE_ALIAS]
+
+            if request.GET.get(RESPONSE_CACHE_BYPASS_PARAM):
+                outcome = 'BYPASS'
+                _count(scope, 'bypass')
+            else:
+                with span('cache'):
+                    cached = cache.get(key)
+                if cached is not None:
+                    _count(scope, 'hit')
+                    status_code, data = cached
+                    response = Response(data, status=status_code)
+                    response[CACHE_STATUS_HEADER] = 'HIT'
+                    return response
+                outcome = 'MISS'
+                _count(scope, 'miss')
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                cache.set(key, (response.status_code, response.data))
+            response[CACHE_STATUS_HEADER] = outcome
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,74 @@
+import logging
+import re
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# FTS5 index over the Book table, created by migration 0004_book_fts
+BOOK_FTS_TABLE = 'api_book_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    """Return True if the FTS5 book index exists in the current database"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [BOOK_FTS_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def _column_query(column, text):
+    """Build an FTS5 expression requiring every word of text as a prefix in column.
+
+    Words are quoted so user input can never inject FTS5 query syntax.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    terms = ' AND '.join(f'"{token}"*' for token in tokens)
+    return f'{column} : ({terms})'
+
+
+def build_match_query(title=None, authors=None):
+    """Combine the BooksListAPI title/authors filters into one FTS5 MATCH expression.
+
+    Keeps the existing OR semantics between the two filters.
+    """
+    clauses = [
+        clause for clause in (
+            _column_query('title', title),
+            _column_query('author', authors),
+        ) if clause
+    ]
+    if not clauses:
+        return None
+    return ' OR '.join(clauses)
+
+
+def search_book_pks(match_query, offset, limit):
+    """Return Book primary keys matching the query, best match first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {BOOK_FTS_TABLE} WHERE {BOOK_FTS_TABLE} MATCH %s "
+            f"ORDER BY rank LIMIT %s OFFSET %s",
+            [match_query, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild_index():
+    """Repopulate the index from the Book table"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def optimize_index():
+    """Merge index segments, worthwhile after a large import"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {BOOK_FTS_TABLE}({BOOK_FTS_TABLE}) VALUES ('optimize')")
@@ -13,6 +13,14 @@ class IssuedBooksSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['issue_date']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Loans read through fines.current_fines() show today's overdue days and fine
+        if hasattr(instance, 'current_fine'):
+            data['overdue'] = instance.current_overdue
+            data['fine'] = instance.current_fine
+        return data
+
 class BookStockSerializer(serializers.ModelSerializer):
     class Meta:
         model = BookStock
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .constants import BOOK_STATUS_ISSUED
+from .fines import invalidate_rates
+from .models import Book, BookStock, FineSettings, IssuedBooks, Members
+from .statistics import LOAN_STATUS_FIELDS, adjust_statistics
+from .stock import claim_copy, record_issue, record_returns
+from .versioning import (
+    BOOKS_VERSION, FINE_SETTINGS_VERSION, LOANS_VERSION, MEMBERS_VERSION, bump_data_version,
+)
+
+# Versions each model's writes invalidate. A loan write always comes with a
+# change to its member's counters and the title's stock.
+WRITE_VERSIONS = {
+    Members: (MEMBERS_VERSION,),
+    IssuedBooks: (LOANS_VERSION, MEMBERS_VERSION, BOOKS_VERSION),
+    BookStock: (BOOKS_VERSION,),
+    Book: (BOOKS_VERSION,),
+}
+
+
+@receiver(post_save, sender=Members)
+@receiver(post_save, sender=IssuedBooks)
+@receiver(post_save, sender=BookStock)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Members)
+@receiver(post_delete, sender=IssuedBooks)
+@receiver(post_delete, sender=BookStock)
+def bump_version_on_write(sender, **kwargs):
+    # Book deletes are bumped explicitly: a post_delete receiver would
+    # disable Django's fast bulk delete for that table. BookStock rows are
+    # deleted one at a time in the admin; bulk wipes use delete_all_stock().
+    bump_data_version(*WRITE_VERSIONS[sender])
+
+
+@receiver(post_save, sender=Members)
+def count_member_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_statistics(total_members=1, active_members=int(bool(instance.is_active)))
+    else:
+        previous = getattr(instance, '_loaded_is_active', None)
+        if previous is not None:
+            adjust_statistics(active_members=int(bool(instance.is_active)) - int(bool(previous)))
+    instance._loaded_is_active = instance.is_active
+
+
+@receiver(post_delete, sender=Members)
+def count_member_delete(sender, instance, **kwargs):
+    adjust_statistics(total_members=-1, active_members=-int(bool(instance.is_active)))
+
+
+# Connected before count_loan_save, which records the saved status
+@receiver(post_save, sender=IssuedBooks)
+def track_loan_stock(sender, instance, created, **kwargs):
+    """Claim or release a copy when a loan saved one at a time opens, closes or changes book.
+
+    Covers the single issue view, the admin and the scripts. Bulk issues and
+    returns write with queryset methods, which send no signals, and adjust
+    the stock themselves. _copy_claimed is False when a new open loan found
+    no copy free; the issue view rolls back on it, other callers keep the loan.
+    """
+    if created:
+        was_open, previous_book_id = False, None
+    else:
+        was_open = getattr(instance, '_loaded_status', instance.status) == BOOK_STATUS_ISSUED
+        previous_book_id = getattr(instance, '_loaded_book_id', instance.book_id)
+    is_open = instance.status == BOOK_STATUS_ISSUED
+
+    if was_open != is_open or (is_open and previous_book_id != instance.book_id):
+        if was_open:
+            record_returns([previous_book_id])
+        if is_open:
+            instance._copy_claimed = claim_copy(instance.book_id)
+            if not instance._copy_claimed:
+                record_issue(instance.book_id)
+    instance._loaded_book_id = instance.book_id
+
+
+@receiver(post_save, sender=IssuedBooks)
+def count_loan_save(sender, instance, created, **kwargs):
+    if created:
+        previous = None
+    elif hasattr(instance, '_loaded_status'):
+        previous = instance._loaded_status
+    else:
+        # Saved without being loaded first, so the change is unknown
+        previous = instance.status
+
+    if previous != instance.status:
+        deltas = {}
+        if previous in LOAN_STATUS_FIELDS:
+            deltas[LOAN_STATUS_FIELDS[previous]] = -1
+        if instance.status in LOAN_STATUS_FIELDS:
+            deltas[LOAN_STATUS_FIELDS[instance.status]] = deltas.get(LOAN_STATUS_FIELDS[instance.status], 0) + 1
+        adjust_statistics(**deltas)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=IssuedBooks)
+def count_loan_delete(sender, instance, **kwargs):
+    field = LOAN_STATUS_FIELDS.get(instance.status)
+    if field:
+        adjust_statistics(**{field: -1})
+
+
+@receiver(post_delete, sender=IssuedBooks)
+def release_loan_copy(sender, instance, **kwargs):
+    # Also runs for the loans a member delete cascades to
+    if instance.status == BOOK_STATUS_ISSUED:
+        record_returns([instance.book_id])
+
+
+@receiver(post_save, sender=BookStock)
+def count_stock_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_statistics(total_books=1)
+
+
+@receiver(post_delete, sender=BookStock)
+def count_stock_delete(sender, instance, **kwargs):
+    adjust_statistics(total_books=-1)
+
+
+@receiver(post_save, sender=Book)
+def count_book_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_statistics(catalog_books=1)
+
+
+@receiver(post_save, sender=FineSettings)
+@receiver(post_delete, sender=FineSettings)
+def reload_rates_on_write(sender, **kwargs):
+    bump_data_version(FINE_SETTINGS_VERSION)
+    # After commit, so the reload in this process sees the new row and version
+    transaction.on_commit(invalidate_rates)
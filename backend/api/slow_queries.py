@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils import timezone
+
+from .metrics import view_label
+
+logger = logging.getLogger(__name__)
+# One JSON object per line, to the rotating file set up in settings.LOGGING
+SLOW_QUERY_LOGGER = 'api.slow_query_log'
+slow_query_log = logging.getLogger(SLOW_QUERY_LOGGER)
+
+# Request being handled, set by SlowQueryMiddleware so entries name their view
+_current_request = ContextVar('slow_query_request', default=None)
+
+# Plans are captured once per query shape per process; EXPLAIN is cheap but not free
+MAX_CACHED_PLANS = 1000
+_plans = {}
+_plans_lock = threading.Lock()
+
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+_IN_LIST = re.compile(r'IN \((?:%s|\?)(?:, ?(?:%s|\?))*\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'(\((?:%s, )*%s\))(?:, \((?:%s, )*%s\))+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+_TABLE_SCAN = re.compile(r'^SCAN ([A-Za-z_]\w*)')
+
+
+def query_shape(sql):
+    """SQL with literals, placeholder lists and whitespace normalized, so variants group together"""
+    shape = _IN_LIST.sub('IN (...)', sql)
+    # Bulk inserts repeat one row of placeholders per object
+    shape = _VALUES_ROWS.sub(r'\1, ...', shape)
+    shape = _STRING_LITERAL.sub('?', shape)
+    # Django inlines LIMIT and OFFSET, and identifiers such as U0 keep their digits
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def shape_fingerprint(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def full_scans(plan):
+    """Tables read by a full scan rather than an index search"""
+    scans = []
+    for detail in plan:
+        match = _TABLE_SCAN.match(detail)
+        if match and 'USING' not in detail and match.group(1) != 'CONSTANT':
+            scans.append(match.group(1))
+    return scans
+
+
+def _redact(value):
+    """Type and size of a bound parameter, never its value"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__}:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact_params(params, many):
+    if params is None:
+        return None
+    if many:
+        return f'<{len(params)} rows>' if hasattr(params, '__len__') else '<rows>'
+    if isinstance(params, dict):
+        return {name: _redact(value) for name, value in params.items()}
+    return [_redact(value) for value in params]
+
+
+def _explain(connection, sql, params, fingerprint):
+    """EXPLAIN QUERY PLAN details for sql, cached per shape; empty off SQLite"""
+    with _plans_lock:
+        plan = _plans.get(fingerprint)
+    if plan is not None:
+        return plan
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+
+    # A fresh backend cursor: the query's own cursor still holds its results,
+    # and bypassing the wrappers keeps EXPLAIN out of the log
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        plan = [f'EXPLAIN failed: {e}']
+    finally:
+        cursor.close()
+
+    with _plans_lock:
+        if len(_plans) >= MAX_CACHED_PLANS:
+            _plans.clear()
+        _plans[fingerprint] = plan
+    return plan
+
+
+def _origin():
+    request = _current_request.get()
+    if request is not None:
+        return f'{request.method} {view_label(request)}', request.path
+    # Management commands and other scripts
+    return ' '.join(sys.argv[:2]), None
+
+
+def slow_query_logger(execute, sql, params, many, context):
+    """Database execute wrapper logging queries slower than SLOW_QUERY_THRESHOLD_MS"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            _log_slow_query(context['connection'], sql, params, many, duration_ms)
+
+
+def _log_slow_query(connection, sql, params, many, duration_ms):
+    try:
+        shape = query_shape(sql)
+        fingerprint = shape_fingerprint(shape)
+        plan = [] if many else _explain(connection, sql, params, fingerprint)
+        origin, path = _origin()
+        slow_query_log.warning(json.dumps({
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration_ms, 2),
+            'alias': connection.alias,
+            'origin': origin,
+            'path': path,
+            'fingerprint': fingerprint,
+            'shape': shape,
+            'params': redact_params(params, many),
+            'plan': plan,
+            'full_scans': full_scans(plan),
+        }))
+    except Exception as e:
+        # Instrumentation must never fail the query it observed
+        logger.error(f"Could not log slow query: {str(e)}")
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """connection_created receiver adding the wrapper to every new connection, in requests and commands"""
+    # First, because connection.execute_wrapper() blocks pop the last wrapper on exit
+    if slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_logger)
+
+
+def set_current_request(request):
+    return _current_request.set(request)
+
+
+def reset_current_request(token):
+    _current_request.reset(token)
@@ -0,0 +1,88 @@
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .constants import BOOK_STATUS_ISSUED, BOOK_STATUS_RETURNED
+from .models import Book, BookStock, IssuedBooks, LibraryStatistics, Members
+
+# LibraryStatistics is a single row
+STATISTICS_PK = 1
+
+STATISTICS_FIELDS = (
+    'total_members', 'active_members', 'issued_books',
+    'returned_books', 'total_books', 'catalog_books',
+)
+
+# Loan status -> statistics field counting loans in that status
+LOAN_STATUS_FIELDS = {
+    BOOK_STATUS_ISSUED: 'issued_books',
+    BOOK_STATUS_RETURNED: 'returned_books',
+}
+
+
+def compute_statistics():
+    """Recompute every counter from scratch with one aggregate query per table"""
+    members = Members.objects.aggregate(
+        total_members=Count('pk'),
+        active_members=Count('pk', filter=Q(is_active=True)),
+    )
+    loans = IssuedBooks.objects.aggregate(
+        issued_books=Count('pk', filter=Q(status=BOOK_STATUS_ISSUED)),
+        returned_books=Count('pk', filter=Q(status=BOOK_STATUS_RETURNED)),
+    )
+    return {
+        **members,
+        **loans,
+        'total_books': BookStock.objects.count(),
+        'catalog_books': Book.objects.count(),
+    }
+
+
+def rebuild_statistics():
+    values = compute_statistics()
+    snapshot, _ = LibraryStatistics.objects.update_or_create(
+        pk=STATISTICS_PK,
+        defaults={**values, 'rebuilt_at': timezone.now()},
+    )
+    return snapshot
+
+
+def get_statistics():
+    """Return the snapshot, building it on first use"""
+    snapshot = LibraryStatistics.objects.filter(pk=STATISTICS_PK).first()
+    if snapshot is None:
+        snapshot = rebuild_statistics()
+    return snapshot
+
+
+def adjust_statistics(**deltas):
+    """Apply counter deltas in a single UPDATE, e.g. adjust_statistics(issued_books=1)"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = LibraryStatistics.objects.filter(pk=STATISTICS_PK).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        # No snapshot yet: build it from the current state, which already includes this change
+        rebuild_statistics()
+
+
+def set_statistics(**values):
+    """Overwrite counters after bulk operations that know the new totals"""
+    updated = LibraryStatistics.objects.filter(pk=STATISTICS_PK).update(**values)
+    if not updated:
+        rebuild_statistics()
+
+
+def statistics_drift():
+    """Return {field: (snapshot, actual)} for counters that disagree with the tables.
+
+    An empty dict means the snapshot is consistent.
+    """
+    snapshot = get_statistics()
+    actual = compute_statistics()
+    return {
+        field: (getattr(snapshot, field), actual[field])
+        for field in STATISTICS_FIELDS
+        if getattr(snapshot, field) != actual[field]
+    }
@@ -0,0 +1,124 @@
+from collections import Counter
+
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+
+from .constants import BOOK_STATUS_ISSUED
+from .models import BookStock, IssuedBooks
+from .statistics import adjust_statistics
+
+
+def stock_book_id(book_id):
+    """BookStock keys books by integer id; return None for ids that cannot be stored"""
+    try:
+        return int(book_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def claim_copy(book_id):
+    """Take one available copy of a book; return False when every copy is issued.
+
+    The availability check and the increment are a single conditional UPDATE,
+    so concurrent issues of the last copy cannot both succeed. Books without a
+    stock row get one with 1 copy. Call inside the issuing transaction.
+    """
+    book_id = stock_book_id(book_id)
+    if book_id is None:
+        # Ids that cannot be stored have no stock to track
+        return True
+    claimed = BookStock.objects.filter(book_id=book_id, issued_count__lt=F('quantity')).update(
+        issued_count=F('issued_count') + 1
+    )
+    if claimed:
+        return True
+    # Either no stock row yet or none left; a concurrent creator wins the unique book_id
+    _, created = BookStock.objects.get_or_create(book_id=book_id, defaults={'quantity': 1, 'issued_count': 1})
+    return created
+
+
+def record_issue(book_id):
+    """Count one more issued copy of a book, whether or not one was available.
+
+    For loans that exist already, such as one created or reopened in the
+    admin, so issued_count keeps matching the open loans. Books without a
+    stock row get one with 1 copy.
+    """
+    book_id = stock_book_id(book_id)
+    if book_id is None:
+        return
+    updated = BookStock.objects.filter(book_id=book_id).update(issued_count=F('issued_count') + 1)
+    if not updated:
+        BookStock.objects.get_or_create(book_id=book_id, defaults={'quantity': 1, 'issued_count': 1})
+
+
+def delete_all_stock():
+    """Delete every BookStock row in one statement, without the per-row delete signals.
+
+    The caller bumps BOOKS_VERSION and resets the statistics once instead.
+    """
+    queryset = BookStock.objects.all()
+    return queryset._raw_delete(queryset.db)
+
+
+def per_key(field, counts):
+    """CASE expression giving counts[key] on rows whose field equals key, else 0"""
+    return Case(*[When(**{field: key}, then=Value(n)) for key, n in counts.items()], default=Value(0))
+
+
+def claim_copies(counts):
+    """Take up to counts[book_id] copies of each book; return {book_id: copies granted}.
+
+    The batch form of claim_copy: one locking read of the stock rows and one
+    UPDATE for all books. Books without a stock row get one with 1 copy.
+    Call inside the issuing transaction.
+    """
+    if not counts:
+        return {}
+    rows = BookStock.objects.select_for_update().filter(book_id__in=counts)
+    stock = {
+        book_id: quantity - issued_count
+        for book_id, quantity, issued_count in rows.values_list('book_id', 'quantity', 'issued_count')
+    }
+
+    missing = counts.keys() - stock.keys()
+    if missing:
+        BookStock.objects.bulk_create(
+            [BookStock(book_id=book_id, quantity=1) for book_id in missing],
+            ignore_conflicts=True,
+        )
+        adjust_statistics(total_books=len(missing))
+        stock.update((book_id, 1) for book_id in missing)
+
+    granted = {book_id: max(0, min(n, stock[book_id])) for book_id, n in counts.items()}
+    taken = {book_id: n for book_id, n in granted.items() if n}
+    if taken:
+        BookStock.objects.filter(book_id__in=taken).update(
+            issued_count=F('issued_count') + per_key('book_id', taken)
+        )
+    return granted
+
+
+def record_returns(book_ids):
+    """Release one issued copy per entry in book_ids with a single UPDATE.
+
+    Call inside the returning transaction.
+    """
+    counts = Counter(stock_book_id(book_id) for book_id in book_ids)
+    counts.pop(None, None)
+    if not counts:
+        return
+    BookStock.objects.filter(book_id__in=counts).update(
+        issued_count=Greatest(F('issued_count') - per_key('book_id', counts), 0)
+    )
+
+
+def issued_counts_by_book():
+    """Issued copies per book, recomputed from loan rows in one grouped query"""
+    counts = {}
+    rows = IssuedBooks.objects.filter(status=BOOK_STATUS_ISSUED).values('book_id').annotate(n=Count('id'))
+    for row in rows:
+        book_id = stock_book_id(row['book_id'])
+        if book_id is not None:
+            counts[book_id] = counts.get(book_id, 0) + row['n']
+    return counts
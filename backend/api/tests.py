@@ -1,3 +1,347 @@
+from datetime import timedelta
+import json
+import tempfile
+from unittest import mock
+
+import httpx
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .catalog import CatalogCache
+from .circulation import return_batch
+from .constants import BOOK_STATUS_ISSUED, BOOK_STATUS_RETURNED
+from .fines import accrue_fines, current_fines, fine_per_day, rent_due
+from .models import BookStock, IssuedBooks, Members
+from .ngram import TrigramIndex, scan
+from .statistics import rebuild_statistics, statistics_drift
+from .upstream_async import _clients
+
+
+def create_member(name='Test Member'):
+    return Members.objects.create(
+        member_name=name,
+        member_email='member@example.com',
+        member_phone='9999999999',
+        end_date=timezone.now().date() + timedelta(days=365),
+    )
+
+
+class StatisticsConsistencyTests(TestCase):
+    """The /statistics/ snapshot must match the tables after every write path"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.return_date = (timezone.now().date() + timedelta(days=14)).isoformat()
+        BookStock.objects.create(book_id=1, quantity=3)
+        BookStock.objects.create(book_id=2, quantity=3)
+        rebuild_statistics()
+
+    def issue(self, book_id, member):
+        return self.client.post('/issued_books/', {
+            'book_id': str(book_id),
+            'book_title': f'Book {book_id}',
+            'book_author': 'Author',
+            'issued_to_member': member.pk,
+            'return_date': self.return_date,
+        }, format='json')
+
+    def assertNoDrift(self):
+        self.assertEqual(statistics_drift(), {})
+
+    def test_issue_return_and_delete(self):
+        first = create_member('First')
+        second = create_member('Second')
+        self.assertNoDrift()
+
+        self.assertEqual(self.issue(1, first).status_code, 201)
+        self.assertEqual(self.issue(2, second).status_code, 201)
+        self.assertNoDrift()
+
+        response = self.client.put('/issued_books/', {'book_id': '1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoDrift()
+
+        # Member delete cascades to its open and returned loans
+        response = self.client.delete(f'/members/?member_id={second.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoDrift()
+
+        first.is_active = False
+        first.save()
+        self.assertNoDrift()
+
+    def test_bulk_issue_and_return(self):
+        member = create_member()
+        loans = [
+            {
+                'book_id': str(book_id),
+                'book_title': f'Book {book_id}',
+                'book_author': 'Author',
+                'issued_to_member': member.pk,
+                'return_date': self.return_date,
+            }
+            # Book 3 has no stock row yet
+            for book_id in (1, 1, 2, 3)
+        ]
+        response = self.client.post('/issued_books/bulk/', {'loans': loans}, format='json')
+        self.assertEqual(response.data['succeeded'], 4)
+        self.assertNoDrift()
+
+        response = self.client.put('/issued_books/bulk/', {'book_ids': ['1', '2', '3']}, format='json')
+        self.assertEqual(response.data['succeeded'], 3)
+        self.assertNoDrift()
+
+    def test_stock_delete(self):
+        # What BookStockAdmin does for a single row and for a selection
+        BookStock.objects.get(book_id=2).delete()
+        self.assertNoDrift()
+        BookStock.objects.filter(book_id=1).delete()
+        self.assertNoDrift()
+
+    def test_drift_is_reported(self):
+        # Raw deletes skip the signals, as in BooksListAPI.delete before its reset
+        BookStock.objects.filter(book_id=2)._raw_delete('default')
+        self.assertEqual(statistics_drift(), {'total_books': (2, 1)})
+        rebuild_statistics()
+        self.assertNoDrift()
+
+
+class StockSignalTests(TestCase):
+    """Copies are released however an open loan goes away, not only through the return views"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.member = create_member()
+        BookStock.objects.create(book_id=9001, quantity=1)
+
+    def issue(self):
+        return self.client.post('/issued_books/', {
+            'book_id': '9001',
+            'book_title': 'Book',
+            'book_author': 'Author',
+            'issued_to_member': self.member.pk,
+            'return_date': (timezone.now().date() + timedelta(days=14)).isoformat(),
+        }, format='json')
+
+    def issued_count(self):
+        return BookStock.objects.get(book_id=9001).issued_count
+
+    def test_issue_claims_the_only_copy(self):
+        self.assertEqual(self.issue().status_code, 201)
+        self.assertEqual(self.issued_count(), 1)
+        self.assertEqual(self.issue().status_code, 409)
+        # The refused loan was rolled back with its claim
+        self.assertEqual(IssuedBooks.objects.count(), 1)
+        self.assertEqual(self.issued_count(), 1)
+
+    def test_member_delete_releases_copies(self):
+        self.assertEqual(self.issue().status_code, 201)
+        # What MembersAdmin does; the loans go with the member by cascade
+        self.member.delete()
+        self.assertEqual(self.issued_count(), 0)
+
+        self.member = create_member()
+        self.assertEqual(self.issue().status_code, 201)
+
+    def test_loan_delete_and_status_change_release_copies(self):
+        self.assertEqual(self.issue().status_code, 201)
+        loan = IssuedBooks.objects.get()
+        loan.status = BOOK_STATUS_RETURNED
+        loan.save()
+        self.assertEqual(self.issued_count(), 0)
+
+        loan.status = BOOK_STATUS_ISSUED
+        loan.save()
+        self.assertEqual(self.issued_count(), 1)
+
+        loan.delete()
+        self.assertEqual(self.issued_count(), 0)
+        self.assertEqual(statistics_drift(), {})
+
+
+class BookStockDeleteTests(TestCase):
+    """Deleting stock rows one at a time, as the admin does, changes the /books/ ETag"""
+
+    def test_etag_changes_after_stock_delete(self):
+        client = APIClient()
+        stock = BookStock.objects.create(book_id=1, quantity=3)
+        # The first read creates stock rows for the rest of the page
+        client.get('/books/')
+        etag = client.get('/books/')['ETag']
+        self.assertEqual(client.get('/books/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        stock.delete()
+        self.assertEqual(client.get('/books/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BulkReturnTests(TestCase):
+    """Bulk returns flip each open loan once, even when requests overlap"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.member = create_member()
+        # Loans saved one at a time claim their copies through the post_save receiver
+        BookStock.objects.create(book_id=1, quantity=2)
+        BookStock.objects.create(book_id=2, quantity=1)
+        return_date = timezone.now().date() + timedelta(days=14)
+        self.loans = [
+            IssuedBooks.objects.create(
+                book_id=book_id, book_title='Book', book_author='Author',
+                issued_to_member=self.member, return_date=return_date,
+            )
+            for book_id in ('1', '1', '2')
+        ]
+        Members.objects.filter(pk=self.member.pk).update(books_issued=3)
+        rebuild_statistics()
+
+    def test_duplicate_entries_return_each_loan_once(self):
+        results = return_batch(['2', '2'])
+        self.assertEqual([result['status'] for result in results], [200, 404])
+
+        # A repeated request finds nothing left to return
+        results = return_batch(['2'])
+        self.assertEqual([result['status'] for result in results], [404])
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.books_issued, 2)
+        self.assertEqual(BookStock.objects.get(book_id=2).issued_count, 0)
+        self.assertEqual(statistics_drift(), {})
+
+    def test_loan_returned_concurrently_rolls_back_the_batch(self):
+        contested = self.loans[1]
+
+        def return_elsewhere(*args):
+            # Another request returns a loan after this batch read it as open. It
+            # runs in the batch's transaction here, standing in for a commit that
+            # select_for_update cannot prevent on SQLite
+            IssuedBooks.objects.filter(pk=contested.pk).update(status=BOOK_STATUS_RETURNED)
+            return rent_due(*args)
+
+        with mock.patch('api.circulation.rent_due', side_effect=return_elsewhere):
+            response = self.client.put('/issued_books/bulk/', {'book_ids': ['1', '1', '2']}, format='json')
+        self.assertEqual(response.status_code, 409)
+
+        # Nothing from the batch was applied
+        statuses = dict(IssuedBooks.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[self.loans[0].pk], BOOK_STATUS_ISSUED)
+        self.assertEqual(statuses[self.loans[2].pk], BOOK_STATUS_ISSUED)
+        self.member.refresh_from_db()
+        self.assertEqual((self.member.books_issued, self.member.outstanding_debt), (3, 0))
+        self.assertEqual(BookStock.objects.get(book_id=1).issued_count, 2)
+
+
+class FineAccrualTests(TestCase):
+    """Accrual writes each loan once; reads and returns see the current fine"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.today = timezone.now().date()
+        member = create_member()
+        self.loan = IssuedBooks.objects.create(
+            book_id='1', book_title='Book', book_author='Author',
+            issued_to_member=member, return_date=self.today - timedelta(days=3),
+        )
+        Members.objects.filter(pk=member.pk).update(books_issued=1)
+
+    def current(self, today):
+        loan = current_fines(IssuedBooks.objects.filter(pk=self.loan.pk), today).get()
+        return loan.current_overdue, loan.current_fine
+
+    def test_already_overdue_loans_are_not_rewritten(self):
+        self.assertEqual(accrue_fines(self.today - timedelta(days=1))[0], 1)
+        self.assertEqual(accrue_fines(self.today)[0], 0)
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.overdue, 2)
+        self.assertEqual(self.current(self.today), (3, 3 * fine_per_day()))
+
+        response = self.client.get(f'/issued_books/?book_id={self.loan.book_id}')
+        self.assertEqual((response.data['overdue'], response.data['fine']), (3, 3 * fine_per_day()))
+
+    def test_admin_shows_the_current_fine(self):
+        accrue_fines(self.today - timedelta(days=1))
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get('/admin/api/issuedbooks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'<td class="field-current_fine">{3 * fine_per_day()}</td>', html=True)
+
+    def test_return_freezes_the_fine(self):
+        response = self.client.put('/issued_books/', {'book_id': '1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.loan.refresh_from_db()
+        self.assertEqual((self.loan.overdue, self.loan.fine), (3, 3 * fine_per_day()))
+        self.assertEqual(self.current(self.today + timedelta(days=5)), (3, 3 * fine_per_day()))
+
+
+class CatalogSearchTests(TestCase):
+    """The trigram index returns what a scan returns, and requests never wait for its build"""
+
+    books = [
+        {'book_id': 1, 'title': 'Operating Systems - Guide', 'author': 'Dr. Neha Iyer'},
+        {'book_id': 2, 'title': 'Power Systems - Theory', 'author': 'Dr. Rudra Menon'},
+        {'book_id': 3, 'title': 'Systems of Ems Stems', 'author': 'Dr. Diya Bose'},
+        {'book_id': 4, 'title': 'Surveying', 'author': 'Dr. Aarav Menon'},
+        {'book_id': 5, 'title': 'Fluid Mechanics'},
+    ]
+
+    def test_index_matches_scan(self):
+        index = TrigramIndex.build(self.books[:2])
+        # Appended records update the posting lists and bitmaps in place
+        index.extend(self.books)
+        for title, authors in [
+            ('systems', None), ('stems', None), ('ems st', None), (None, 'menon'),
+            ('systems', 'menon'), ('sy', None), ('no such title', None), (None, 'iyer'),
+        ]:
+            self.assertEqual(index.search(title, authors), scan(self.books, title, authors), (title, authors))
+
+    def test_search_scans_until_the_index_is_built(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump(self.books, f)
+            f.flush()
+            cache = CatalogCache(f.name)
+            books = cache.get_books()
+
+            started = []
+            with mock.patch.object(CatalogCache, '_start_index_build', lambda self, books: started.append(books)):
+                self.assertEqual(cache.search(books, 'systems'), self.books[:3])
+            self.assertEqual(started, [books])
+
+            cache._build_index(books)
+            self.assertIs(cache.get_search_index(books).books, books)
+            self.assertEqual(cache.search(books, 'systems'), self.books[:3])
+
+
+class AsyncBooksClientTests(TestCase):
+    """/books/async/ leaves no open upstream client behind when served through WSGI"""
+
+    def test_wsgi_request_closes_its_client(self):
+        clients = []
+
+        def new_client():
+            # One Frappe page of two books, then an empty page
+            def respond(request):
+                page = int(request.url.params['page'])
+                books = [{'bookID': str(page * 10 + i), 'title': 'Book'} for i in range(2)] if page == 1 else []
+                return httpx.Response(200, json={'message': books})
+
+            clients.append(httpx.AsyncClient(transport=httpx.MockTransport(respond)))
+            return clients[-1]
+
+        async def cache_miss(key):
+            return None, None
+
+        async def cache_set(*args):
+            pass
+
+        with mock.patch('api.async_views._has_local_catalog', return_value=False), \
+                mock.patch('api.upstream_async._new_client', new_client), \
+                mock.patch('api.upstream_async._cache_get', cache_miss), \
+                mock.patch('api.upstream_async._cache_set', cache_set):
+            response = self.client.get('/books/async/?count=5')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(clients), 1)
+        self.assertTrue(clients[0].is_closed)
+        self.assertEqual(len(_clients), 0)
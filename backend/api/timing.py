@@ -0,0 +1,106 @@
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# RequestTiming for the request being handled, set by ServerTimingMiddleware
+_current = ContextVar('request_timing', default=None)
+# Every RequestTiming counting this request's queries: the Server-Timing one
+# and MetricsMiddleware's. Context variables follow the request into the
+# threads sync_to_async runs the ORM in, unlike per-connection wrappers.
+_collectors = ContextVar('query_collectors', default=())
+
+_NO_SPAN = nullcontext()
+
+
+class RequestTiming:
+    """Query count, SQL time and named spans collected for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        # {name: [seconds, count]} in the order spans were first entered
+        self.spans = {}
+        # When the view returned a response still to be rendered
+        self.view_finished = None
+
+    def add(self, name, seconds):
+        totals = self.spans.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+    def add_query(self, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+
+
+def count_queries(execute, sql, params, many, context):
+    """Database execute wrapper adding each query and its time to the request's collectors"""
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        for timing in collectors:
+            timing.add_query(seconds)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created receiver adding count_queries to every new connection"""
+    # First, because connection.execute_wrapper() blocks pop the last wrapper on exit
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+def collect_queries(timing):
+    """Count this request's queries into timing; returns a token for stop_collecting"""
+    return _collectors.set(_collectors.get() + (timing,))
+
+
+def stop_collecting(token):
+    _collectors.reset(token)
+
+
+class _Span:
+    __slots__ = ('timing', 'name', 'started')
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timing.add(self.name, time.perf_counter() - self.started)
+
+
+def current_timing():
+    return _current.get()
+
+
+def start_timing():
+    """Begin collecting spans and queries for this request; returns (timing, token for stop_timing)"""
+    timing = RequestTiming()
+    return timing, (_current.set(timing), collect_queries(timing))
+
+
+def stop_timing(token):
+    current_token, collect_token = token
+    stop_collecting(collect_token)
+    _current.reset(current_token)
+
+
+def span(name):
+    """Time a block as a named Server-Timing entry.
+
+    Spans may overlap the db entry, since they include the queries they run.
+    Costs one context variable lookup when timing is off.
+    """
+    timing = _current.get()
+    if timing is None:
+        return _NO_SPAN
+    return _Span(timing, name)
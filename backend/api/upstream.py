@@ -0,0 +1,147 @@
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import (
+    FRAPPE_API_URL, FRAPPE_DEADLINE_SECONDS, FRAPPE_MAX_CONCURRENCY,
+    FRAPPE_PAGE_SIZE, FRAPPE_TIMEOUT_SECONDS, MAX_API_PAGES,
+)
+from .metrics import record_cache_lookup, record_upstream_error
+from .upstream_cache import STALE, cache_key, page_cache
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """The Frappe API answered with a non-200 status"""
+
+    def __init__(self, status_code):
+        super().__init__(f"Frappe API returned {status_code}")
+        self.status_code = status_code
+
+
+class UpstreamTimeout(Exception):
+    """The overall deadline passed before enough pages arrived"""
+
+
+def error_kind(error):
+    """Metrics label for a failed fetch: http_<status>, timeout, invalid_response or connection"""
+    if isinstance(error, UpstreamError):
+        return f'http_{error.status_code}'
+    if isinstance(error, (UpstreamTimeout, requests.Timeout)):
+        return 'timeout'
+    if isinstance(error, ValueError):
+        return 'invalid_response'
+    return 'connection'
+
+
+def _build_session():
+    session = requests.Session()
+    # Keep-alive pool sized for the concurrent page fetches
+    adapter = HTTPAdapter(pool_connections=FRAPPE_MAX_CONCURRENCY, pool_maxsize=FRAPPE_MAX_CONCURRENCY * 2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_session = _build_session()
+_executor = ThreadPoolExecutor(max_workers=FRAPPE_MAX_CONCURRENCY, thread_name_prefix='frappe')
+
+
+def _fetch_page_uncached(url, params, timeout=FRAPPE_TIMEOUT_SECONDS):
+    started = time.monotonic()
+    response = _session.get(url, params=params, timeout=timeout)
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
+    books = response.json().get('message', [])
+    page_cache.set(cache_key(url, params), books, time.monotonic() - started)
+    return books
+
+
+def _refresh_page(url, params, key):
+    try:
+        _fetch_page_uncached(url, params)
+    except (UpstreamError, requests.RequestException, ValueError) as e:
+        record_upstream_error(error_kind(e))
+        logger.warning(f"Background refresh of Frappe page failed: {str(e)}")
+    finally:
+        page_cache.finish_refresh(key)
+
+
+def fetch_page(url, params, timeout=FRAPPE_TIMEOUT_SECONDS):
+    """Fetch one page of books from the Frappe API over the pooled session.
+
+    Fresh cached pages are returned without a request; stale ones are
+    returned immediately and refreshed in the background.
+    """
+    key = cache_key(url, params)
+    books, state = page_cache.get(key)
+    record_cache_lookup('frappe_pages', 'miss' if state is None else 'hit')
+    if state == STALE and page_cache.start_refresh(key):
+        _executor.submit(_refresh_page, url, params, key)
+    if state is not None:
+        return books
+    return _fetch_page_uncached(url, params, timeout)
+
+
+def fetch_books(count, start_page=1, title=None, authors=None, url=None,
+                max_pages=MAX_API_PAGES, deadline_seconds=FRAPPE_DEADLINE_SECONDS):
+    """Collect up to count books from consecutive Frappe pages starting at start_page.
+
+    Pages are fetched concurrently, but only as many as are still needed to
+    reach count, and results are consumed in page order. Returns
+    (books, error): on a failure or when the overall deadline passes, the
+    books gathered so far are returned together with the exception.
+    """
+    url = url or FRAPPE_API_URL
+    params = {}
+    if title:
+        params['title'] = title
+    if authors:
+        params['authors'] = authors
+
+    deadline = time.monotonic() + deadline_seconds
+    books = []
+    pending = {}
+    next_page = start_page
+    current_page = start_page
+    error = None
+
+    try:
+        while len(books) < count and current_page <= max_pages:
+            # Keep enough pages in flight to cover the books still missing
+            wanted = min(FRAPPE_MAX_CONCURRENCY, math.ceil((count - len(books)) / FRAPPE_PAGE_SIZE))
+            while next_page <= max_pages and len(pending) < max(1, wanted):
+                page_params = dict(params, page=next_page)
+                pending[next_page] = _executor.submit(fetch_page, url, page_params)
+                next_page += 1
+
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise FutureTimeoutError()
+                fetched = pending.pop(current_page).result(timeout=remaining)
+            except FutureTimeoutError:
+                error = UpstreamTimeout(f"Timed out after {deadline_seconds}s waiting for page {current_page}")
+                break
+            except (UpstreamError, requests.RequestException, ValueError) as e:
+                error = e
+                break
+
+            if not fetched:
+                break  # Exit if no more books are returned
+            books.extend(fetched)
+            current_page += 1
+    finally:
+        # Pages fetched beyond what we needed are dropped
+        for future in pending.values():
+            future.cancel()
+
+    if error:
+        record_upstream_error(error_kind(error))
+        logger.warning(f"Frappe fetch stopped with {len(books)} books: {error}")
+    return books[:count], error
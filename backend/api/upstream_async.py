@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import time
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from .constants import (
+    FRAPPE_API_URL, FRAPPE_ASYNC_MAX_CONNECTIONS, FRAPPE_DEADLINE_SECONDS, FRAPPE_MAX_CONCURRENCY,
+    FRAPPE_PAGE_SIZE, FRAPPE_TIMEOUT_SECONDS, MAX_API_PAGES,
+)
+from .metrics import record_cache_lookup, record_upstream_error
+from .upstream import UpstreamError, UpstreamTimeout, error_kind
+from .upstream_cache import STALE, cache_key, page_cache
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per event loop, shared by every request the loop serves;
+# a client cannot be shared across loops. close_clients() closes it on shutdown.
+_clients = weakref.WeakKeyDictionary()
+# Client of a request whose loop ends with it, set by request_client()
+_request_client = ContextVar('frappe_request_client', default=None)
+# Background refreshes, referenced so they are not garbage collected mid-flight
+_refresh_tasks = set()
+
+# The page cache is a local SQLite file; keep its I/O off the event loop
+_cache_get = sync_to_async(page_cache.get, thread_sensitive=False)
+_cache_set = sync_to_async(page_cache.set, thread_sensitive=False)
+
+
+# Marks a page that had not arrived when the deadline passed
+_MISSING = object()
+
+
+def _outcome(task):
+    if not task.done() or task.cancelled():
+        return _MISSING
+    return task.exception() or task.result()
+
+
+def _error_kind(error):
+    return 'timeout' if isinstance(error, httpx.TimeoutException) else error_kind(error)
+
+
+def _new_client():
+    return httpx.AsyncClient(
+        timeout=FRAPPE_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=FRAPPE_ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=FRAPPE_ASYNC_MAX_CONNECTIONS // 4,
+        ),
+    )
+
+
+def _client():
+    client = _request_client.get()
+    if client is not None:
+        return client
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _new_client()
+        _clients[loop] = client
+    return client
+
+
+@asynccontextmanager
+async def request_client():
+    """Fetch with a client of this request's own, closed when the block exits.
+
+    For event loops that end with the request, as when Django runs an async
+    view under WSGI through async_to_sync: a pooled client would be left open
+    with its keep-alive sockets on the discarded loop. Stale pages are
+    served without a background refresh, which would not outlive the loop.
+    """
+    async with _new_client() as client:
+        token = _request_client.set(client)
+        try:
+            yield client
+        finally:
+            _request_client.reset(token)
+
+
+async def close_clients():
+    """Close the running loop's pooled client; called as the ASGI server shuts down"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _fetch_page_uncached(url, params):
+    started = time.monotonic()
+    response = await _client().get(url, params=params)
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
+    books = response.json().get('message', [])
+    await _cache_set(cache_key(url, params), books, time.monotonic() - started)
+    return books
+
+
+async def _refresh_page(url, params, key):
+    try:
+        await _fetch_page_uncached(url, params)
+    except (UpstreamError, httpx.HTTPError, ValueError) as e:
+        record_upstream_error(_error_kind(e))
+        logger.warning(f"Background refresh of Frappe page failed: {str(e)}")
+    finally:
+        page_cache.finish_refresh(key)
+
+
+async def fetch_page_async(url, params):
+    """Async counterpart of upstream.fetch_page, sharing its on-disk page cache"""
+    key = cache_key(url, params)
+    books, state = await _cache_get(key)
+    record_cache_lookup('frappe_pages', 'miss' if state is None else 'hit')
+    if state == STALE and _request_client.get() is None and page_cache.start_refresh(key):
+        task = asyncio.create_task(_refresh_page(url, params, key))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    if state is not None:
+        return books
+    return await _fetch_page_uncached(url, params)
+
+
+async def fetch_books_async(count, start_page=1, title=None, authors=None, url=None,
+                            max_pages=MAX_API_PAGES, deadline_seconds=FRAPPE_DEADLINE_SECONDS):
+    """Async counterpart of upstream.fetch_books with the same (books, error) result.
+
+    Each round gathers the pages still needed to reach count, at most
+    FRAPPE_MAX_CONCURRENCY at a time, on the event loop instead of a
+    thread pool. Pages are consumed in order, stopping at the first empty
+    page, failure or the overall deadline.
+    """
+    url = url or FRAPPE_API_URL
+    params = {}
+    if title:
+        params['title'] = title
+    if authors:
+        params['authors'] = authors
+
+    deadline = time.monotonic() + deadline_seconds
+    books = []
+    next_page = start_page
+    error = None
+
+    while error is None and len(books) < count and next_page <= max_pages:
+        wanted = min(FRAPPE_MAX_CONCURRENCY, math.ceil((count - len(books)) / FRAPPE_PAGE_SIZE),
+                     max_pages - next_page + 1)
+        pages = range(next_page, next_page + max(1, wanted))
+        tasks = [asyncio.create_task(fetch_page_async(url, dict(params, page=page))) for page in pages]
+        next_page = pages[-1] + 1
+
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*tasks, return_exceptions=True),
+                timeout=max(0, deadline - time.monotonic()),
+            )
+        except asyncio.TimeoutError:
+            # Keep the pages that did arrive, in order, up to the first missing one
+            results = [_outcome(task) for task in tasks]
+            error = UpstreamTimeout(f"Timed out after {deadline_seconds}s waiting for Frappe pages")
+
+        for fetched in results:
+            if fetched is _MISSING:
+                break
+            if isinstance(fetched, (UpstreamError, httpx.HTTPError, ValueError)):
+                error = fetched
+                break
+            if isinstance(fetched, BaseException):
+                raise fetched
+            if not fetched:
+                # No more books upstream
+                next_page = max_pages + 1
+                break
+            books.extend(fetched)
+
+    if error:
+        record_upstream_error(_error_kind(error))
+        logger.warning(f"Frappe fetch stopped with {len(books)} books: {error}")
+    return books[:count], error
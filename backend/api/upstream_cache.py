@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .constants import FRAPPE_CACHE_MAX_BYTES, FRAPPE_CACHE_STALE_SECONDS, FRAPPE_CACHE_TTL_SECONDS
+from .metrics import record_upstream_latency_saved
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache of Frappe API pages, shared by all workers on the host
+FRAPPE_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frappe_cache.sqlite3')
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def cache_key(url, params):
+    """Key an upstream query by URL and normalized parameters"""
+    normalized = {
+        key: str(value).strip().lower() if key in ('title', 'authors') else str(value)
+        for key, value in params.items() if value not in (None, '')
+    }
+    raw = json.dumps([url, sorted(normalized.items())], separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class UpstreamPageCache:
+    """SQLite-backed TTL cache for upstream responses.
+
+    Entries younger than ttl are fresh; entries up to ttl + stale_ttl old are
+    served immediately while the caller refreshes them in the background.
+    Total payload size is kept under max_bytes by evicting the least
+    recently used entries. Being a file, the cache survives worker restarts
+    and is shared between gunicorn workers.
+    """
+
+    def __init__(self, path, ttl=FRAPPE_CACHE_TTL_SECONDS, stale_ttl=FRAPPE_CACHE_STALE_SECONDS,
+                 max_bytes=FRAPPE_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.latency_saved = 0.0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, latency REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return (value, state) where state is FRESH or STALE, or (None, None) on a miss"""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, fetched_at, latency FROM pages WHERE key = ?", [key]
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, None
+
+            value, fetched_at, latency = row
+            now = time.time()
+            age = now - fetched_at
+            if age > self.ttl + self.stale_ttl:
+                self.misses += 1
+                return None, None
+
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", [now, key])
+            self.latency_saved += latency
+            # Summed over every worker in api/metrics.py
+            record_upstream_latency_saved(latency)
+            if age <= self.ttl:
+                self.hits += 1
+                return json.loads(value), FRESH
+            self.stale_hits += 1
+            return json.loads(value), STALE
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Upstream cache read failed: {str(e)}")
+            self.misses += 1
+            return None, None
+
+    def set(self, key, value, latency):
+        payload = json.dumps(value, separators=(',', ':'))
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (key, value, size, fetched_at, accessed_at, latency) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [key, payload, len(payload), now, now, latency],
+            )
+            self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Upstream cache write failed: {str(e)}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit
+        excess = total - self.max_bytes
+        freed = 0
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM pages ORDER BY accessed_at"):
+            keys.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM pages WHERE key = ?", [[key] for key in keys])
+
+    def start_refresh(self, key):
+        """Claim a background refresh for key; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def finish_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM pages")
+
+    def stats(self):
+        """Lookups, hit ratio and upstream time saved by this worker process"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'latency_saved_seconds': round(self.latency_saved, 3),
+        }
+
+
+page_cache = UpstreamPageCache(FRAPPE_CACHE_PATH)
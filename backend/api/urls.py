@@ -1,14 +1,24 @@
 from django.urls import path, include
 from .views import *
+from .async_views import books_list_async
 
 urlpatterns = [
     path('books/', BooksListAPI.as_view()),
+    path('books/async/', books_list_async),
     path('members/', MembersAPI.as_view()),
+    path('members/import/', MembersImportAPI.as_view()),
+    path('members/export/', MembersExportAPI.as_view()),
     path('issued_books/', IssuedBooksAPI.as_view()),
+    path('issued_books/bulk/', IssuedBooksBulkAPI.as_view()),
+    path('issued_books/export/', IssuedBooksExportAPI.as_view()),
     path('issued_books_list/', IssuedBooksListAPI.as_view()),
     path('overdue_book_list/', OverDueBookList.as_view()),
+    path('overdue_book_list/export/', OverdueExportAPI.as_view()),
     path('members/<int:member_id>/settle_dues/', SettleDuesAPI.as_view()),
     path('settle_member_debt/', SettleMemberDebtAPI.as_view()),
     path('statistics/', StatisticsAPI.as_view()),
+    path('cache_stats/', ResponseCacheStatsAPI.as_view()),
+    # No trailing slash: the path Prometheus scrapes by default
+    path('metrics', MetricsAPI.as_view()),
     path('members_page/', MembersPageAPI.as_view())
 ]
\ No newline at end of file
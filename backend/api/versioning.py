@@ -0,0 +1,64 @@
+import hashlib
+
+from django.db.models import F
+
+from .catalog import catalog_cache
+from .models import Book, DataVersion
+
+# Single row covering loans, members and stock
+LIBRARY_VERSION = 'library'
+# Narrower versions advanced together with LIBRARY_VERSION, so the response
+# cache only drops the responses that read the data a write changed
+MEMBERS_VERSION = 'members'
+LOANS_VERSION = 'loans'
+BOOKS_VERSION = 'books'  # Book catalog and BookStock
+LIBRARY_VERSIONS = (MEMBERS_VERSION, LOANS_VERSION, BOOKS_VERSION)
+# Bumped when FineSettings changes, so every worker reloads the rates
+FINE_SETTINGS_VERSION = 'fine_settings'
+
+
+def bump_data_version(*names):
+    """Advance LIBRARY_VERSION and the named versions, or every library version if none are named.
+
+    Call from every write path not covered by signals, naming what it changed.
+    """
+    names = {LIBRARY_VERSION, *(names or LIBRARY_VERSIONS)}
+    updated = DataVersion.objects.filter(pk__in=names).update(version=F('version') + 1)
+    if updated < len(names):
+        existing = set(DataVersion.objects.filter(pk__in=names).values_list('pk', flat=True))
+        for name in names - existing:
+            DataVersion.objects.get_or_create(pk=name, defaults={'version': 1})
+
+
+def current_data_version(name=LIBRARY_VERSION):
+    version = DataVersion.objects.filter(pk=name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def data_versions(*names):
+    """Current versions of names, in the same order, read in one query"""
+    versions = dict(DataVersion.objects.filter(pk__in=names).values_list('pk', 'version'))
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def request_etag(request, *tokens):
+    """Strong ETag for this URL and representation at the given data version"""
+    parts = [
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        request.META.get('HTTP_ACCEPT', ''),
+        *map(str, tokens),
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def catalog_etag(request, *args, **kwargs):
+    """etag_func for endpoints that also depend on the local catalog.
+
+    Returns None, disabling conditional GET, when books come from the
+    Frappe API since their freshness cannot be derived locally.
+    """
+    signature = catalog_cache.signature()
+    if signature is None and not Book.objects.exists():
+        return None
+    return request_etag(request, signature, current_data_version())
@@ -3,157 +3,255 @@ from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-import requests
 from rest_framework import status
 from .models import *
 from .serializers import *
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .constants import *
+from .catalog import catalog_cache, BOOKS_DATA_PATH, CATALOG_FIELDS
+from .search import build_match_query, fts_available, search_book_pks
+from .pagination import cursor_paginate, cached_count, decode_keyset, encode_keyset
+from .stock import delete_all_stock, record_returns, stock_book_id
+from .upstream import fetch_books, UpstreamError, UpstreamTimeout
+from .upstream_cache import page_cache
+from .versioning import (
+    BOOKS_VERSION, LIBRARY_VERSION, LOANS_VERSION, MEMBERS_VERSION, bump_data_version, catalog_etag,
+)
+from .timing import span
+from .metrics import ScrapeRegistry
+from .response_cache import cache_response, catalog_signature, catalog_state, overdue_state, response_cache_stats
+from .statistics import adjust_statistics, get_statistics, set_statistics
+from .fines import (
+    after_return_date, current_fines, fines_etag, overdue_loans, rent_due, rent_per_day, returned_fine_fields,
+)
+from .circulation import ReturnConflict, issue_batch, return_batch
+from .member_import import IMPORT_FORMATS, detect_format, import_members, iter_member_rows
+from .exports import ExportError, export_response, loans_export, members_export, overdue_export
 import urllib.parse
+from datetime import date
 import logging
 import json
 import os
 
 logger = logging.getLogger(__name__)
 
+def _stock_availability(book_ids):
+    """Return {str(book_id): (quantity, issued_count)} for a page of books.
+
+    Uses a fixed number of queries regardless of how many ids are passed:
+    one for stock rows, which carry their issued counter, and one bulk
+    insert for missing stock rows.
+    """
+    stock_ids = set()
+    for book_id in book_ids:
+        book_id = stock_book_id(book_id)
+        if book_id is not None:
+            stock_ids.add(book_id)
+    if not stock_ids:
+        return {}
+
+    availability = {}
+    rows = BookStock.objects.filter(book_id__in=stock_ids).values_list('book_id', 'quantity', 'issued_count')
+    for book_id, quantity, issued_count in rows:
+        availability[book_id] = (quantity, issued_count)
+
+    # Default to 1 copy for books that have no stock row yet
+    missing = stock_ids - availability.keys()
+    if missing:
+        # A concurrent request may create the same rows; book_id is unique
+        BookStock.objects.bulk_create(
+            [BookStock(book_id=book_id, quantity=1) for book_id in missing],
+            ignore_conflicts=True,
+        )
+        adjust_statistics(total_books=len(missing))
+        bump_data_version(BOOKS_VERSION)
+        for book_id in missing:
+            availability[book_id] = (1, 0)
+
+    return {str(book_id): counts for book_id, counts in availability.items()}
+
+
+def _cursor_page_response(request, queryset, serializer_class, count_key):
+    """Keyset-paginated response, used when a request passes ?cursor=
+
+    An empty cursor starts from the beginning; follow the returned next/prev
+    cursors for further pages. Pass total=true for a cached row count.
+    """
+    try:
+        page_size = int(request.GET.get('count', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    page_size = max(1, page_size)
+
+    try:
+        rows, next_cursor, prev_cursor = cursor_paginate(queryset, request.GET.get('cursor'), page_size)
+    except ValueError as e:
+        logger.warning(str(e))
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        'next': next_cursor,
+        'prev': prev_cursor,
+    }
+    with span('serialize'):
+        data['results'] = serializer_class(rows, many=True).data
+    if request.GET.get('total', '').lower() in ('1', 'true', 'yes'):
+        data['total'] = cached_count(queryset, count_key)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+def upstream_books_payload(books, error):
+    """Return (payload, status) for books fetched from the Frappe API.
+
+    Books are annotated with their stock. Partial results are returned as a
+    success when some pages failed or timed out; an error is only reported
+    when no books arrived at all.
+    """
+    if error and not books:
+        if isinstance(error, UpstreamError):
+            logger.error(f"Failed to fetch books from Frappe API: {error.status_code}")
+            return {'error': 'Failed to fetch data'}, status.HTTP_400_BAD_REQUEST
+        if isinstance(error, UpstreamTimeout):
+            logger.error(f"Timed out fetching books: {str(error)}")
+            return {'error': str(error)}, status.HTTP_504_GATEWAY_TIMEOUT
+        logger.error(f"Request error while fetching books: {str(error)}")
+        return {'error': str(error)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    try:
+        availability = _stock_availability([book.get('bookID') for book in books])
+    except Exception as e:
+        logger.error(f"Unexpected error while fetching books: {str(e)}")
+        return {'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    for book in books:
+        book_id = book.get('bookID')
+        quantity, issued_count = availability.get(str(book_id), (1, 0))
+        available_count = max(0, quantity - issued_count)
+
+        book['total_copies'] = quantity
+        book['available_copies'] = available_count
+        book['issued_copies'] = issued_count
+        book['status'] = "Available" if available_count > 0 else "Issued"
+    return books, status.HTTP_200_OK
+
+
 class BooksListAPI(APIView):
     permission_classes = [AllowAny]  # Books are publicly viewable
     
+    @method_decorator(condition(etag_func=catalog_etag))
+    @method_decorator(cache_response('books', BOOKS_VERSION, state=catalog_state))
     def get(self, request):
         count = int(request.GET.get('count', 20))
         page = int(request.GET.get('page', 1))
         title = request.GET.get('title')
         authors = request.GET.get('authors')
         
-        # Try to load BTech books from local JSON file first
-        try:
-            import json
-            import os
-            
-            # Get the path to books_data.json
-            json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'books_data.json')
-            
-            if os.path.exists(json_path):
-                with open(json_path, 'r') as f:
-                    btech_books = json.load(f)
-                
-                # Filter by title or author if provided
-                filtered_books = btech_books
+        start_idx = max(0, (page - 1) * count)
+        end_idx = start_idx + count
+        page_books = None
+        
+        match_query = build_match_query(title, authors) if (title or authors) else None
+        
+        if Book.objects.exists():
+            # Serve from the imported Book table
+            books = Book.objects.order_by('book_id')
+            if match_query and fts_available():
+                # Ranked prefix search through the FTS5 index
+                with span('search'):
+                    pks = search_book_pks(match_query, start_idx, count)
+                with span('catalog'):
+                    rows = {row['id']: row for row in Book.objects.filter(id__in=pks).values('id', *CATALOG_FIELDS)}
+                page_books = [rows[pk] for pk in pks if pk in rows]
+            else:
                 if title or authors:
-                    filtered_books = []
-                    for book in btech_books:
-                        title_match = title and title.lower() in book['title'].lower()
-                        author_match = authors and 'author' in book and authors.lower() in book['author'].lower()
-                        if title_match or author_match:
-                            filtered_books.append(book)
-                    btech_books = filtered_books
+                    # No FTS5 index available, fall back to a substring scan
+                    match = Q()
+                    if title:
+                        match |= Q(title__icontains=title)
+                    if authors:
+                        match |= Q(author__icontains=authors)
+                    books = books.filter(match)
+                with span('catalog'):
+                    page_books = list(books.values(*CATALOG_FIELDS)[start_idx:end_idx])
+        else:
+            # Try to load BTech books from the cached local catalog
+            try:
+                with span('catalog'):
+                    btech_books = catalog_cache.get_books()
                 
-                # Format books for frontend
-                formatted_books = []
-                for book in btech_books:
-                    book_id = book.get('book_id')
-                    
-                    # Get or create book stock
-                    book_stock, created = BookStock.objects.get_or_create(
-                        book_id=book_id,
-                        defaults={'quantity': 1}  # Default to 1 copy if new
-                    )
-                    
-                    # Count issued copies
-                    issued_count = IssuedBooks.objects.filter(book_id=book_id, status="Issued").count()
-                    available_count = max(0, book_stock.quantity - issued_count)
+                if btech_books is not None:
+                    # Filter by title or author through the in-memory trigram index
+                    if title or authors:
+                        with span('search'):
+                            btech_books = catalog_cache.search(btech_books, title, authors)
                     
-                    formatted_book = {
-                        'bookID': book_id,
-                        'title': book.get('title'),
-                        'authors': book.get('author'),
-                        'average_rating': DEFAULT_BOOK_RATING,
-                        'publisher': book.get('publisher'),
-                        'publication_date': str(book.get('publication_year')),
-                        'isbn': book.get('isbn'),
-                        'isbn13': book.get('isbn'),
-                        'language_code': DEFAULT_LANGUAGE_CODE,
-                        'num_pages': DEFAULT_BOOK_PAGES,
-                        'ratings_count': DEFAULT_RATINGS_COUNT,
-                        'text_reviews_count': DEFAULT_REVIEWS_COUNT,
-                        'total_copies': book_stock.quantity,
-                        'available_copies': available_count,
-                        'issued_copies': issued_count,
-                        'status': "Available" if available_count > 0 else "Issued"
-                    }
-                    
-                    formatted_books.append(formatted_book)
+                    # Paginate before enrichment so only the visible page hits the database
+                    page_books = btech_books[start_idx:end_idx]
+            except (json.JSONDecodeError, IOError, KeyError) as e:
+                logger.warning(f"Error loading BTech books: {str(e)}")
+                # If local books fail, fall back to external API
+        
+        if page_books is not None:
+            with span('enrich'):
+                availability = _stock_availability([book.get('book_id') for book in page_books])
+            
+            # Format books for frontend
+            paginated_books = []
+            for book in page_books:
+                book_id = book.get('book_id')
+                quantity, issued_count = availability.get(str(book_id), (1, 0))
+                available_count = max(0, quantity - issued_count)
                 
-                # Paginate results
-                start_idx = (page - 1) * count
-                end_idx = start_idx + count
-                paginated_books = formatted_books[start_idx:end_idx]
+                formatted_book = {
+                    'bookID': book_id,
+                    'title': book.get('title'),
+                    'authors': book.get('author'),
+                    'average_rating': DEFAULT_BOOK_RATING,
+                    'publisher': book.get('publisher'),
+                    'publication_date': str(book.get('publication_year')),
+                    'isbn': book.get('isbn'),
+                    'isbn13': book.get('isbn'),
+                    'language_code': DEFAULT_LANGUAGE_CODE,
+                    'num_pages': DEFAULT_BOOK_PAGES,
+                    'ratings_count': DEFAULT_RATINGS_COUNT,
+                    'text_reviews_count': DEFAULT_REVIEWS_COUNT,
+                    'total_copies': quantity,
+                    'available_copies': available_count,
+                    'issued_copies': issued_count,
+                    'status': "Available" if available_count > 0 else "Issued"
+                }
                 
-                return Response(paginated_books, status=status.HTTP_200_OK)
-        except (json.JSONDecodeError, IOError, KeyError) as e:
-            logger.warning(f"Error loading BTech books: {str(e)}")
-            # If local books fail, fall back to external API
+                paginated_books.append(formatted_book)
+            
+            return Response(paginated_books, status=status.HTTP_200_OK)
         
         # Fallback to external API
-        url = FRAPPE_API_URL
-        books = []
-        max_pages = MAX_API_PAGES
-
-        while len(books) < count and page <= max_pages:
-            params = {'page': page}
-            if title:
-                params.update({"title": title})
-            if authors:
-                params["authors"] = authors
-            try:
-                frappe_response = requests.get(url, params=params)
-                response_data = frappe_response.json()
-
-                if frappe_response.status_code == 200:
-                    fetched_books = response_data.get('message', [])
-                    for book in fetched_books:
-                        book_id = book.get('bookID')
-                        
-                        # Get or create book stock
-                        book_stock, created = BookStock.objects.get_or_create(
-                            book_id=book_id,
-                            defaults={'quantity': 1}
-                        )
-                        
-                        # Count issued copies
-                        issued_count = IssuedBooks.objects.filter(book_id=book_id, status="Issued").count()
-                        available_count = max(0, book_stock.quantity - issued_count)
-                        
-                        book['total_copies'] = book_stock.quantity
-                        book['available_copies'] = available_count
-                        book['issued_copies'] = issued_count
-                        book['status'] = "Available" if available_count > 0 else "Issued"
-                        books.append(book)
-                    if not fetched_books:
-                        break  # Exit if no more books are returned
-                    page += 1
-                else:
-                    logger.error(f"Failed to fetch books from Frappe API: {frappe_response.status_code}")
-                    return Response({'error': 'Failed to fetch data'}, status=status.HTTP_400_BAD_REQUEST)
-            except requests.RequestException as e:
-                logger.error(f"Request error while fetching books: {str(e)}")
-                return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            except Exception as e:
-                logger.error(f"Unexpected error while fetching books: {str(e)}")
-                return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        return Response(books[:count], status=status.HTTP_200_OK)
+        with span('upstream'):
+            books, error = fetch_books(count, start_page=page, title=title, authors=authors)
+        with span('enrich'):
+            payload, status_code = upstream_books_payload(books, error)
+        return Response(payload, status=status_code)
         
     def delete(self, request):
         """Delete all books from BookStock model and books_data.json"""
         if not request.user.is_authenticated or not request.user.is_staff:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         try:
-            # Delete all BookStock entries
-            BookStock.objects.all().delete()
+            # Delete all Book and BookStock entries
+            Book.objects.all().delete()
+            delete_all_stock()
+            bump_data_version(BOOKS_VERSION)
+            set_statistics(total_books=0, catalog_books=0)
             
             # Clear the books_data.json file
-            json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'books_data.json')
+            json_path = BOOKS_DATA_PATH
             
             if os.path.exists(json_path):
                 try:
@@ -161,6 +259,7 @@ class BooksListAPI(APIView):
                         json.dump([], f)
                 except IOError as file_error:
                     logger.warning(f"Could not clear books_data.json: {str(file_error)}")
+                catalog_cache.invalidate()
             
             return Response({"message": "All books deleted successfully"}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -170,7 +269,11 @@ class BooksListAPI(APIView):
 class MembersAPI(APIView):
     permission_classes = [AllowAny]  # Members list is publicly viewable
     
+    @method_decorator(cache_response('members', MEMBERS_VERSION))
     def get(self, request):
+        if 'cursor' in request.GET:
+            return _cursor_page_response(request, Members.objects.all(), MembersSerializer, 'members')
+
         count = request.GET.get('count')
 
         try:
@@ -183,8 +286,9 @@ class MembersAPI(APIView):
         if count:
             members = members[:count]
 
-        serialized_members = MembersSerializer(members, many=True)
-        return Response(serialized_members.data, status=status.HTTP_200_OK)
+        with span('serialize'):
+            serialized_members = MembersSerializer(members, many=True).data
+        return Response(serialized_members, status=status.HTTP_200_OK)
 
     def post(self, request):
         serializer = MembersSerializer(data=request.data)
@@ -200,6 +304,7 @@ class MembersAPI(APIView):
                 member_id = request.data.get('member_id') or request.GET.get('member_id')
             if member_id:
                 member = Members.objects.get(member_id=member_id)
+                # Loans are deleted with the member; their post_delete receiver releases the copies
                 member.delete()
                 return Response({"message": f"Member {member_id} deleted successfully"}, status=status.HTTP_200_OK)
             else:
@@ -211,10 +316,56 @@ class MembersAPI(APIView):
             logger.error(f"Error deleting member {member_id}: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class MembersImportAPI(APIView):
+    permission_classes = [IsAuthenticated]  # Bulk onboarding is for staff
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': "Upload a CSV or NDJSON file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Large uploads are spooled to disk by Django and read back row by row
+            summary = import_members(iter_member_rows(upload.file, fmt))
+        except Exception as e:
+            logger.error(f"Error importing members from {upload.name}: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        stopped_at = summary['stopped_at']
+        if stopped_at:
+            # Rows before the unreadable line are already committed; say so, so
+            # a retry only sends the rest of the file
+            logger.warning(
+                f"Imported {summary['created']} members from {upload.name} before line {stopped_at['row']}: "
+                f"{stopped_at['error']}"
+            )
+            return Response(
+                {
+                    'error': f"Could not read {upload.name} from line {stopped_at['row']}: {stopped_at['error']}. "
+                             f"The {summary['created']} members before it were imported.",
+                    **summary,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(f"Imported {summary['created']} members from {upload.name} ({summary['failed']} rejected)")
+        return Response(summary, status=status.HTTP_200_OK)
+
 class MembersPageAPI(APIView):
     permission_classes = [AllowAny]
     
+    @method_decorator(cache_response('members_page', MEMBERS_VERSION))
     def get(self, request):
+        if 'cursor' in request.GET:
+            return _cursor_page_response(request, Members.objects.all(), MembersSerializer, 'members')
+
         # Get page and page_size from request parameters
         page_number = request.GET.get('page', 1)
         page_size = request.GET.get('count', 20)  # Default page size is 20
@@ -237,31 +388,39 @@ class MembersPageAPI(APIView):
             logger.warning(f"Invalid page request: page={page_number}, size={page_size}")
             return Response([], status=status.HTTP_404_NOT_FOUND)
 
-        serialized_members = MembersSerializer(page.object_list, many=True)
+        with span('serialize'):
+            serialized_members = MembersSerializer(page.object_list, many=True).data
 
         # Return paginated data
         return Response({
             'total_pages': paginator.num_pages,
             'current_page': page_number,
             'total_members': paginator.count,
-            'members': serialized_members.data
+            'members': serialized_members
         }, status=status.HTTP_200_OK)
 
 
 class IssuedBooksListAPI(APIView):
     permission_classes = [AllowAny]  # Issued books list is viewable
     
+    @method_decorator(condition(etag_func=fines_etag))
+    @method_decorator(cache_response('issued_books_list', LOANS_VERSION, state=overdue_state))
     def get(self, request):
+        if 'cursor' in request.GET:
+            issued_books = current_fines(IssuedBooks.objects.filter(status=BOOK_STATUS_ISSUED))
+            return _cursor_page_response(request, issued_books, IssuedBooksSerializer, 'issued_books')
+
         count = request.GET.get('count')
 
-        issued_books = IssuedBooks.objects.filter(status = "Issued")
+        issued_books = current_fines(IssuedBooks.objects.filter(status = "Issued"))
 
         if count:
             count = int(count)
             issued_books = issued_books[:count]
 
-        serialized_issued_books = IssuedBooksSerializer(issued_books, many=True)
-        return Response(serialized_issued_books.data, status=status.HTTP_200_OK)
+        with span('serialize'):
+            serialized_issued_books = IssuedBooksSerializer(issued_books, many=True).data
+        return Response(serialized_issued_books, status=status.HTTP_200_OK)
 
 
 class IssuedBooksAPI(APIView):
@@ -273,7 +432,7 @@ class IssuedBooksAPI(APIView):
         if not book_id:
             return Response({'message': 'Book Id is requried'})
 
-        issued_book = IssuedBooks.objects.filter(book_id = book_id, status="Issued").first()
+        issued_book = current_fines(IssuedBooks.objects.filter(book_id = book_id, status="Issued")).first()
 
         if not issued_book:
             return Response({'message': 'Book not issued yet'}, status=status.HTTP_404_NOT_FOUND)
@@ -304,32 +463,25 @@ class IssuedBooksAPI(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        # Check available copies
-        book_stock = BookStock.objects.filter(book_id=book_id).first()
-        if not book_stock:
-            # Auto-create with 1 copy if doesn't exist
-            book_stock = BookStock.objects.create(book_id=book_id, quantity=1)
-        
-        issued_count = IssuedBooks.objects.filter(book_id=book_id, status="Issued").count()
-        available_count = book_stock.quantity - issued_count
-        
-        if available_count <= 0:
-            return Response(
-                {'error': 'No copies available. All copies are currently issued.'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         serializer = IssuedBooksSerializer(data = data, partial = True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if serializer.is_valid():
+        with transaction.atomic():
+            # The post_save receiver claims the copy with a conditional UPDATE
             issued_book = serializer.save()
+            if not getattr(issued_book, '_copy_claimed', True):
+                transaction.set_rollback(True)
+                return Response(
+                    {'error': 'No copies available. All copies are currently issued.'}, 
+                    status=status.HTTP_409_CONFLICT
+                )
 
             # Increase the books_issued count for the member
-            member = issued_book.issued_to_member
-            member.books_issued += 1
-            member.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            Members.objects.filter(pk=issued_book.issued_to_member_id).update(
+                books_issued=F('books_issued') + 1
+            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def put(self, request):
         book_id = request.data.get('book_id')
@@ -342,62 +494,166 @@ class IssuedBooksAPI(APIView):
             return Response({'error' : 'Issued book not found'}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            # Get fine settings
-            fine_settings = FineSettings.objects.first()
-            rent_per_day = fine_settings.rent_cost_per_day if fine_settings else RENT_COST_PER_DAY
+            rent = rent_due(issued_book.issue_date, today, rent_per_day())
 
-            member = issued_book.issued_to_member
-            member.books_issued -= 1
-            rent_days = (today - issued_book.issue_date).days
-            if issued_book.issue_date == today:
-                rent_days = 1
+            with transaction.atomic():
+                # Only the request that flips the status returns the loan, freezing its fine
+                returned = IssuedBooks.objects.filter(pk=issued_book.pk, status=BOOK_STATUS_ISSUED).update(
+                    status=BOOK_STATUS_RETURNED, **returned_fine_fields(today)
+                )
+                if not returned:
+                    return Response({'error': 'Issued book was already returned'}, status=status.HTTP_409_CONFLICT)
 
-            member.outstanding_debt += (rent_days * rent_per_day)
-            member.save()
-            issued_book.status = BOOK_STATUS_RETURNED
-            issued_book.save()
+                Members.objects.filter(pk=issued_book.issued_to_member_id).update(
+                    books_issued=Greatest(F('books_issued') - 1, 0),
+                    outstanding_debt=F('outstanding_debt') + rent,
+                )
+                record_returns([issued_book.book_id])
+                # Queryset updates skip the save signals
+                adjust_statistics(issued_books=-1, returned_books=1)
+                bump_data_version()
             return Response({'message' : 'Issued Book returned successfully'}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error returning book {book_id}: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _bulk_items(request, key):
+    """Return (items, None) for a bulk request body, or (None, error response)"""
+    items = request.data.get(key) if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, Response({'error': f"'{key}' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_ITEMS:
+        return None, Response(
+            {'error': f"At most {MAX_BULK_ITEMS} items per request"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return items, None
+
+
+def _bulk_response(results):
+    succeeded = sum(1 for result in results if result['status'] < 300)
+    return Response(
+        {'succeeded': succeeded, 'failed': len(results) - succeeded, 'results': results},
+        status=status.HTTP_200_OK
+    )
+
+
+class IssuedBooksBulkAPI(APIView):
+    permission_classes = [AllowAny]  # Same access as IssuedBooksAPI
+
+    def post(self, request):
+        loans, error = _bulk_items(request, 'loans')
+        if error:
+            return error
+        try:
+            return _bulk_response(issue_batch(loans))
+        except Exception as e:
+            logger.error(f"Error issuing {len(loans)} books: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def put(self, request):
+        book_ids, error = _bulk_items(request, 'book_ids')
+        if error:
+            return error
+        try:
+            return _bulk_response(return_batch(book_ids))
+        except ReturnConflict as e:
+            logger.warning(f"Bulk return of {len(book_ids)} books rolled back: {str(e)}")
+            return Response(
+                {'error': f"{e}. Nothing was returned; retry the request."},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            logger.error(f"Error returning {len(book_ids)} books: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ExportAPI(APIView):
+    """Stream a CSV or NDJSON dump; subclasses set build and name"""
+    permission_classes = [IsAuthenticated]  # Full dumps include member contact details
+    build = None
+    name = None
+
+    def get(self, request):
+        try:
+            return export_response(self.build, request.GET, self.name)
+        except ExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MembersExportAPI(ExportAPI):
+    build = staticmethod(members_export)
+    name = 'members'
+
+
+class IssuedBooksExportAPI(ExportAPI):
+    build = staticmethod(loans_export)
+    name = 'issued-books'
+
+
+class OverdueExportAPI(ExportAPI):
+    build = staticmethod(overdue_export)
+    name = 'overdue-books'
+
+
 class OverDueBookList(APIView):
     permission_classes = [AllowAny]  # Overdue list is viewable
     
+    @method_decorator(cache_response('overdue_book_list', LOANS_VERSION, MEMBERS_VERSION, state=overdue_state))
     def get(self, request):
         try:
             count = int(request.GET.get('count', DEFAULT_PAGE_SIZE))
         except (ValueError, TypeError):
             count = DEFAULT_PAGE_SIZE
         
-        today = timezone.now().date()
-        
+        # Longest overdue first, in the (status, return_date) index order so
+        # the database stops after count rows instead of sorting them all
+        overdue_books = overdue_loans().order_by('return_date', 'pk')
+
+        paginated = 'cursor' in request.GET
+        if paginated:
+            # Keyset on (return_date, pk): every page is one index range scan
+            count = max(1, count)
+            try:
+                after = decode_keyset(request.GET.get('cursor'), 2)
+                if after is not None:
+                    overdue_books = after_return_date(
+                        overdue_books, date.fromisoformat(after[0]), int(after[1])
+                    )
+            except (TypeError, ValueError) as e:
+                logger.warning(str(e))
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            # Get fine settings
-            fine_settings = FineSettings.objects.first()
-            fine_per_day = fine_settings.fine_per_day if fine_settings else FINE_PER_DAY
-            
-            overdue_books = IssuedBooks.objects.filter(return_date__lt=today, status=BOOK_STATUS_ISSUED)
-            result = []
-
-            for overdue_book in overdue_books:
-                overdue_days = (today - overdue_book.return_date).days
-                overdue_book.fine = (overdue_days * fine_per_day)
-                overdue_book.overdue = overdue_days
-                overdue_book.save()
-                
-                result.append({
-                    'member_id': overdue_book.issued_to_member.member_id,
-                    'member_name': overdue_book.issued_to_member.member_name,
-                    'book_id': overdue_book.book_id,
-                    'book_title': overdue_book.book_title,
-                    'book_author': overdue_book.book_author,
-                    'overdue': overdue_book.overdue,
-                    'fine': overdue_book.fine
-                })
-            
-            return Response(result[:count], status=status.HTTP_200_OK)
+            # Overdue days and fines are computed by the database; reads never write
+            overdue_books = overdue_books.values(
+                'pk', 'return_date', 'book_id', 'book_title', 'book_author', 'overdue_days', 'fine_due',
+                member_id=F('issued_to_member__member_id'),
+                member_name=F('issued_to_member__member_name'),
+            )[:count + 1 if paginated else count]
+            with span('overdue'):
+                overdue_books = list(overdue_books)
+            has_more = len(overdue_books) > count
+            overdue_books = overdue_books[:count]
+            result = [
+                {
+                    'member_id': overdue_book['member_id'],
+                    'member_name': overdue_book['member_name'],
+                    'book_id': overdue_book['book_id'],
+                    'book_title': overdue_book['book_title'],
+                    'book_author': overdue_book['book_author'],
+                    'overdue': overdue_book['overdue_days'],
+                    'fine': overdue_book['fine_due']
+                }
+                for overdue_book in overdue_books
+            ]
+
+            if paginated:
+                last = overdue_books[-1] if overdue_books else None
+                next_cursor = encode_keyset([last['return_date'].isoformat(), last['pk']]) if has_more else None
+                return Response({'next': next_cursor, 'results': result}, status=status.HTTP_200_OK)
+            return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error fetching overdue books: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -442,38 +698,58 @@ class SettleDuesAPI(APIView):
 class StatisticsAPI(APIView):
     permission_classes = [AllowAny]  # Statistics are publicly viewable
     
+    @method_decorator(condition(etag_func=catalog_etag))
+    @method_decorator(cache_response('statistics', LIBRARY_VERSION, state=catalog_signature))
     def get(self, request):
         try:
-            total_members = Members.objects.count()
-            active_members = Members.objects.filter(is_active=True).count()
-            issued_books = IssuedBooks.objects.filter(status=BOOK_STATUS_ISSUED).count()
-            returned_books = IssuedBooks.objects.filter(status=BOOK_STATUS_RETURNED).count()
-            
-            # Get total books from BookStock
-            total_books = BookStock.objects.count()
+            # Single-row snapshot maintained incrementally by api/signals.py
+            snapshot = get_statistics()
             
-            # Get total books from books_data.json
-            total_btech_books = 0
-            try:
-                json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'books_data.json')
-                
-                if os.path.exists(json_path):
-                    with open(json_path, 'r') as f:
-                        btech_books = json.load(f)
-                    total_btech_books = len(btech_books)
-            except (IOError, json.JSONDecodeError) as e:
-                logger.warning(f"Error loading books_data.json: {str(e)}")
-                total_btech_books = 0
+            # Catalog size from the Book table, falling back to books_data.json
+            total_btech_books = snapshot.catalog_books
+            if not total_btech_books:
+                try:
+                    with span('catalog'):
+                        btech_books = catalog_cache.get_books()
+                    
+                    if btech_books is not None:
+                        total_btech_books = len(btech_books)
+                except (IOError, json.JSONDecodeError) as e:
+                    logger.warning(f"Error loading books_data.json: {str(e)}")
+                    total_btech_books = 0
 
             data = {
-                "total_members": total_members,
-                "active_members": active_members,
-                "issued_books": issued_books,
-                "returned_books": returned_books,
-                "total_books": total_books,
+                "total_members": snapshot.total_members,
+                "active_members": snapshot.active_members,
+                "issued_books": snapshot.issued_books,
+                "returned_books": snapshot.returned_books,
+                "total_books": snapshot.total_books,
                 "total_btech_books": total_btech_books
             }
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error fetching statistics: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ResponseCacheStatsAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Response, Frappe page and catalog cache counters, kept by the worker that answers"""
+        return Response(
+            {
+                'responses': response_cache_stats(),
+                'frappe_pages': page_cache.stats(),
+                'catalog': catalog_cache.stats(),
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class MetricsAPI(APIView):
+    permission_classes = [AllowAny]  # Scraped by Prometheus; no member data
+
+    def get(self, request):
+        """Prometheus text format, summed over every worker process"""
+        return HttpResponse(generate_latest(ScrapeRegistry()), content_type=CONTENT_TYPE_LATEST)
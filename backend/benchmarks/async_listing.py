@@ -0,0 +1,204 @@
+"""
+Load test the upstream-bound /books/ listing under a slow local Frappe stub.
+It compares a gunicorn sync worker (WSGI) with a single uvicorn worker
+serving the synchronous view and the async /books/async/ view (ASGI).
+
+Usage: python benchmarks/async_listing.py [--requests N] [--concurrency N] [--delay SECONDS]
+
+Every server runs one worker against a scratch database with no local
+catalog, so each request goes upstream; unique titles keep the Frappe page
+cache from answering. The real db.sqlite3 and page cache are never touched.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SCENARIOS = [
+    # (name, server, path)
+    ('wsgi gunicorn sync', 'gunicorn', '/books/'),
+    ('asgi sync view', 'uvicorn', '/books/'),
+    ('asgi async view', 'uvicorn', '/books/async/'),
+]
+
+
+def _configure_django():
+    """Point a server process at the benchmark's scratch database, stub and cache"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
+    from django.conf import settings
+    import django
+
+    for database in settings.DATABASES.values():
+        database['NAME'] = os.environ['BENCH_DB']
+    settings.DEBUG = False
+    django.setup()
+
+    from api import catalog, upstream, upstream_async
+    from api.upstream_cache import page_cache
+
+    catalog.catalog_cache.path = os.environ['BENCH_CATALOG']
+    upstream.FRAPPE_API_URL = upstream_async.FRAPPE_API_URL = os.environ['BENCH_UPSTREAM']
+    page_cache.path = os.environ['BENCH_PAGE_CACHE']
+
+
+def wsgi_app():
+    _configure_django()
+    from django.core.wsgi import get_wsgi_application
+    return get_wsgi_application()
+
+
+def asgi_app():
+    _configure_django()
+    from django.core.asgi import get_asgi_application
+    return get_asgi_application()
+
+
+def start_stub(delay):
+    """Frappe stand-in that answers every page with 20 books after delay seconds"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            page = int(parse_qs(urlparse(self.path).query).get('page', ['1'])[0])
+            books = [
+                {'bookID': str(page * 100 + i), 'title': f"Stub Book {page}-{i}", 'authors': "Stub Author"}
+                for i in range(20)
+            ]
+            body = json.dumps({'message': books}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 512
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, env):
+    if kind == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', '--workers', '1', '--timeout', '300',
+            '--backlog', '512', '--bind', f'127.0.0.1:{port}', 'benchmarks.async_listing:wsgi_app()',
+        ]
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', '--factory', 'benchmarks.async_listing:asgi_app',
+            '--workers', '1', '--backlog', '512', '--log-level', 'warning', '--port', str(port),
+        ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(client, url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get(url)
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def load(base_url, path, requests, concurrency):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        await wait_ready(client, f"{base_url}{path}?count=20&title=warmup")
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        failures = 0
+
+        async def one(n):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    # A unique title per request misses the page cache every time
+                    response = await client.get(f"{base_url}{path}", params={'count': 40, 'title': f"bench {n}"})
+                    ok = response.status_code == 200 and len(response.json()) == 40
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                failures += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'throughput': requests / elapsed,
+        'in_flight': sum(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': sorted(latencies)[int(len(latencies) * 0.95)] * 1000,
+        'failures': failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.3, help="Stub latency per upstream page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            BENCH_DB=os.path.join(tmp, 'bench.sqlite3'),
+            BENCH_CATALOG=os.path.join(tmp, 'no_books_data.json'),
+        )
+        stub = start_stub(args.delay)
+        env['BENCH_UPSTREAM'] = f"http://127.0.0.1:{stub.server_address[1]}/"
+        os.environ.update(env, BENCH_PAGE_CACHE=os.path.join(tmp, 'frappe_cache.sqlite3'))
+        _configure_django()
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+        print(f"Stub upstream answers each page in {args.delay}s; "
+              f"{args.requests} requests of 2 pages each, {args.concurrency} concurrent\n")
+
+        print(f"{'scenario':<22}{'req/s':>8}{'in flight':>11}{'p50 ms':>9}{'p95 ms':>9}{'failed':>8}")
+        for name, kind, path in SCENARIOS:
+            port = free_port()
+            # A fresh page cache per scenario, so none answers from an earlier run
+            env['BENCH_PAGE_CACHE'] = os.path.join(tmp, f'frappe_cache_{port}.sqlite3')
+            server = start_server(kind, port, env)
+            try:
+                result = asyncio.run(load(f"http://127.0.0.1:{port}", path, args.requests, args.concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{name:<22}{result['throughput']:>8.1f}{result['in_flight']:>11.1f}"
+                  f"{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}{result['failures']:>8}", flush=True)
+        stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
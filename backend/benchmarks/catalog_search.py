@@ -0,0 +1,87 @@
+"""
+Compare the trigram index in api/ngram.py with the linear scan BooksListAPI
+used to run over books_data.json records.
+
+Usage: python benchmarks/catalog_search.py [size ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.ngram import TrigramIndex
+
+SUBJECTS = [
+    "Data Structures", "Operating Systems", "Computer Networks", "Thermodynamics",
+    "Fluid Mechanics", "Power Systems", "Control Systems", "VLSI Design",
+    "Machine Learning", "Surveying", "Immunology", "Aerodynamics", "Heat Treatment",
+]
+SUFFIXES = ["Fundamentals", "Principles", "Handbook", "Guide", "Concepts", "Theory", "Practice"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ishaan", "Rudra", "Ananya", "Saanvi", "Diya", "Neha"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Gupta", "Nayak", "Talwar", "Iyer", "Menon", "Bose"]
+
+QUERIES = [
+    ("handbook", None),
+    ("mechanics", None),
+    (None, "talwar"),
+    ("systems", "menon"),
+    ("vlsi design - guide", None),
+    ("no such title", None),
+]
+
+
+def make_books(count):
+    rng = random.Random(42)
+    return [
+        {
+            "book_id": i,
+            "title": f"{rng.choice(SUBJECTS)} - {rng.choice(SUFFIXES)} Vol {i}",
+            "author": f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def scan(books, title, authors):
+    # The filter BooksListAPI applied before the index existed
+    result = []
+    for book in books:
+        title_match = title and title.lower() in book['title'].lower()
+        author_match = authors and 'author' in book and authors.lower() in book['author'].lower()
+        if title_match or author_match:
+            result.append(book)
+    return result
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def run(size):
+    books = make_books(size)
+    build_ms, index = timed(lambda: TrigramIndex.build(books), 1)
+    print(f"\n{size} titles: index built in {build_ms:.0f} ms, {index.memory_postings()} postings")
+    print(f"  {'query':<32} {'scan ms':>10} {'index ms':>10} {'matches':>9}")
+
+    repeat = 3 if size >= 1000000 else 5
+    for title, authors in QUERIES:
+        scan_ms, expected = timed(lambda: scan(books, title, authors), repeat)
+        index_ms, found = timed(lambda: index.search(title, authors), repeat)
+        assert found == expected, (title, authors)
+        label = f"title={title!r}" if title else ''
+        if authors:
+            label = f"{label} authors={authors!r}".strip()
+        print(f"  {label:<32} {scan_ms:>10.2f} {index_ms:>10.2f} {len(found):>9}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    for size in sizes:
+        run(size)
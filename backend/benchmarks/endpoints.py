@@ -0,0 +1,214 @@
+"""
+Seed a throwaway SQLite database with synthetic data and compare query
+plans and latencies of the main endpoints without and with the hot-path
+indexes from migrations 0009 and 0010.
+
+Usage: python benchmarks/endpoints.py [--members N] [--loans N] [--books N] [--repeat N]
+
+The real db.sqlite3 is never touched.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Indexes dropped for the "before" run and recreated for the "after" run
+HOT_PATH_INDEXES = [
+    'issued_book_status_idx',
+    'issued_status_return_idx',
+    'bookstock_book_id_unique',
+]
+
+
+def setup_django(db_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
+    from django.conf import settings
+    import django
+
+    # Every alias, so the read replica follows the scratch database too
+    for database in settings.DATABASES.values():
+        database['NAME'] = db_path
+    # Keep every query on one connection so they can all be captured and explained
+    settings.DATABASE_ROUTERS = []
+    # Measure the database, not the response cache
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.DEBUG = False
+    django.setup()
+
+
+def seed(members, loans, books):
+    from django.core.management import call_command
+    from api.models import Book, BookStock, IssuedBooks, Members
+    from api.statistics import rebuild_statistics
+
+    call_command('migrate', verbosity=0)
+    rng = random.Random(7)
+    today = date.today()
+
+    print(f"Seeding {members} members, {books} catalog and stocked books, {loans} loans...")
+    Members.objects.bulk_create(
+        [
+            Members(member_name=f"Member {i}", member_email=f"m{i}@example.com",
+                    member_phone="9999999999", end_date=today + timedelta(days=365))
+            for i in range(members)
+        ],
+        batch_size=5000,
+    )
+    # /books/ serves from the Book table once it has rows, like after import_catalog
+    Book.objects.bulk_create(
+        [
+            Book(book_id=i, title=f"Book {i}", author=f"Author {i % 500}", publisher="Publisher",
+                 publication_year=2020, isbn=f"978{i:010d}")
+            for i in range(1, books + 1)
+        ],
+        batch_size=5000,
+    )
+    BookStock.objects.bulk_create(
+        [BookStock(book_id=i, quantity=rng.randint(1, 10)) for i in range(1, books + 1)],
+        batch_size=5000,
+    )
+
+    member_ids = list(Members.objects.values_list('member_id', flat=True))
+    batch = []
+    for i in range(loans):
+        # Most history is returned; a tail of open loans, some overdue
+        issued = rng.random() < 0.1
+        return_date = today + timedelta(days=rng.randint(-60, 14))
+        batch.append(IssuedBooks(
+            book_id=str(rng.randint(1, books)),
+            book_title=f"Book {i}",
+            book_author="Author",
+            issued_to_member_id=rng.choice(member_ids),
+            return_date=return_date,
+            status="Issued" if issued else "Returned",
+        ))
+        if len(batch) >= 5000:
+            IssuedBooks.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        IssuedBooks.objects.bulk_create(batch)
+
+    call_command('reconcile_stock', verbosity=0, stdout=open(os.devnull, 'w'))
+    rebuild_statistics()
+
+
+def capture_index_sql():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN (%s)"
+            % ', '.join(['%s'] * len(HOT_PATH_INDEXES)),
+            HOT_PATH_INDEXES,
+        )
+        index_sql = dict(cursor.fetchall())
+    for name in HOT_PATH_INDEXES:
+        if index_sql.get(name) is None:
+            # SQLite keeps unique constraints as table-level autoindexes, which cannot be dropped
+            print(f"{name} is part of its table definition and stays in place for the before run")
+    return {name: sql for name, sql in index_sql.items() if sql}
+
+
+def set_indexes(index_sql, enabled):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        for name, sql in index_sql.items():
+            if enabled:
+                cursor.execute(sql)
+            else:
+                cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        cursor.execute("ANALYZE")
+
+
+def endpoints():
+    from api.models import IssuedBooks
+
+    sample_book = IssuedBooks.objects.filter(status="Issued").values_list('book_id', flat=True).first() or '1'
+    return [
+        ("books page 50", 'get', '/books/?count=20&page=50', None),
+        ("issued book lookup", 'get', f'/issued_books/?book_id={sample_book}', None),
+        ("issued books list", 'get', '/issued_books_list/?count=20', None),
+        ("overdue list", 'get', '/overdue_book_list/?count=20', None),
+        ("statistics", 'get', '/statistics/', None),
+        ("members page 10", 'get', '/members_page/?page=10&count=20', None),
+    ]
+
+
+def check_overdue_plan():
+    """Fail unless the overdue page is read in (status, return_date) index order, without a sort"""
+    from django.db.models import F
+    from api.fines import overdue_loans
+
+    queryset = overdue_loans().order_by('return_date', 'pk').values(
+        'book_id', member_name=F('issued_to_member__member_name'),
+    )[:20]
+    plan = queryset.explain()
+    print(f"\noverdue list plan:\n{plan}")
+    assert 'issued_status_return_idx' in plan, "overdue query does not use the (status, return_date) index"
+    assert 'TEMP B-TREE' not in plan, "overdue query sorts every overdue loan before applying count"
+
+
+def measure(label, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    print(f"\n=== {label} ===")
+    for name, method, url, data in endpoints():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(url, data, format='json')
+            timings.append((time.perf_counter() - started) * 1000)
+
+        rows = len(response.data) if isinstance(response.data, list) else '-'
+        print(f"\n{name}: {url} -> {response.status_code}, {rows} rows, {len(queries.captured_queries)} queries, "
+              f"median {statistics.median(timings):.2f} ms, best {min(timings):.2f} ms")
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = '; '.join(row[-1] for row in cursor.fetchall())
+                print(f"    {sql[:90]}{'...' if len(sql) > 90 else ''}")
+                print(f"      plan: {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--members', type=int, default=20000)
+    parser.add_argument('--loans', type=int, default=500000)
+    parser.add_argument('--books', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    if args.books < 50 * 20:
+        parser.error("--books must be at least 1000 for the books page 50 case")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        seed(args.members, args.loans, args.books)
+
+        index_sql = capture_index_sql()
+        set_indexes(index_sql, enabled=False)
+        measure("before: without hot-path indexes", args.repeat)
+        set_indexes(index_sql, enabled=True)
+        measure("after: with hot-path indexes", args.repeat)
+        check_overdue_plan()
+
+        from django.db import connection
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Hammer the issue and return endpoints for one title from many threads and
+check that no copy is over-issued or returned twice and that member counters
+add up. Reports throughput for both phases.
+
+Usage: python benchmarks/issue_stress.py [--threads N] [--attempts N] [--copies N] [--members N]
+
+Runs against a throwaway SQLite database; the real db.sqlite3 is never touched.
+Exits non-zero when an invariant is broken.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOOK_ID = 4242
+
+
+def setup_django(db_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
+    from django.conf import settings
+    import django
+
+    # Every alias, so the read replica follows the scratch database too
+    for database in settings.DATABASES.values():
+        database['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+    # Expected 404s on the return phase would otherwise flood the output
+    logging.getLogger('api.views').setLevel(logging.ERROR)
+
+
+def seed(members, copies):
+    from django.core.management import call_command
+    from api.models import BookStock, Members
+
+    call_command('migrate', verbosity=0)
+    today = date.today()
+    Members.objects.bulk_create([
+        Members(member_name=f"Member {i}", member_email=f"m{i}@example.com",
+                member_phone="9999999999", end_date=today + timedelta(days=365))
+        for i in range(members)
+    ])
+    BookStock.objects.create(book_id=BOOK_ID, quantity=copies)
+    return list(Members.objects.values_list('member_id', flat=True))
+
+
+def run_threads(threads, worker):
+    """Run worker(index, statuses) in each thread; return (status Counter, seconds)"""
+    from django.db import connection
+
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def target(index):
+        local = Counter()
+        barrier.wait()
+        try:
+            worker(index, local)
+        finally:
+            connection.close()
+        with lock:
+            statuses.update(local)
+
+    pool = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+def report(phase, statuses, elapsed):
+    total = sum(statuses.values())
+    breakdown = ', '.join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+    print(f"{phase}: {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s) [{breakdown}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=25, help="Issue attempts per thread")
+    parser.add_argument('--copies', type=int, default=50)
+    parser.add_argument('--members', type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'stress.sqlite3'))
+        from rest_framework.test import APIClient
+        from api.constants import BOOK_STATUS_ISSUED, BOOK_STATUS_RETURNED
+        from api.models import BookStock, IssuedBooks, Members
+        from api.statistics import statistics_drift
+
+        member_ids = seed(args.members, args.copies)
+        return_date = (date.today() + timedelta(days=7)).isoformat()
+
+        def issue(index, statuses):
+            client = APIClient()
+            rng = random.Random(index)
+            for attempt in range(args.attempts):
+                response = client.post('/issued_books/', {
+                    'book_id': str(BOOK_ID),
+                    'book_title': "Contended Title",
+                    'book_author': "Author",
+                    'issued_to_member': rng.choice(member_ids),
+                    'return_date': return_date,
+                }, format='json')
+                statuses[response.status_code] += 1
+
+        def give_back(index, statuses):
+            client = APIClient()
+            # Every thread keeps returning until nothing is left, so returns race each other
+            while True:
+                response = client.put('/issued_books/', {'book_id': str(BOOK_ID)}, format='json')
+                statuses[response.status_code] += 1
+                if response.status_code == 404:
+                    return
+
+        failures = []
+
+        def check(label, actual, expected):
+            ok = actual == expected
+            print(f"  {'ok  ' if ok else 'FAIL'} {label}: {actual} (expected {expected})")
+            if not ok:
+                failures.append(label)
+
+        issued_statuses, elapsed = run_threads(args.threads, issue)
+        report("issue", issued_statuses, elapsed)
+        stock = BookStock.objects.get(book_id=BOOK_ID)
+        open_loans = IssuedBooks.objects.filter(book_id=str(BOOK_ID), status=BOOK_STATUS_ISSUED)
+        expected_issued = min(args.copies, args.threads * args.attempts)
+        check("successful issues", issued_statuses[201], expected_issued)
+        check("open loans", open_loans.count(), expected_issued)
+        check("stock issued_count", stock.issued_count, expected_issued)
+        per_member = Counter(open_loans.values_list('issued_to_member_id', flat=True))
+        check("members with wrong books_issued", sum(
+            1 for member_id, books_issued in Members.objects.values_list('member_id', 'books_issued')
+            if books_issued != per_member.get(member_id, 0)
+        ), 0)
+
+        returned_statuses, elapsed = run_threads(args.threads, give_back)
+        report("return", returned_statuses, elapsed)
+        stock.refresh_from_db()
+        check("successful returns", returned_statuses[200], expected_issued)
+        check("returned loans", IssuedBooks.objects.filter(status=BOOK_STATUS_RETURNED).count(), expected_issued)
+        check("stock issued_count", stock.issued_count, 0)
+        check("members with books still issued", Members.objects.filter(books_issued__gt=0).count(), 0)
+        check("statistics drift", statistics_drift(), {})
+
+        from django.db import connection
+        connection.close()
+
+    if failures:
+        sys.exit(f"{len(failures)} invariant(s) broken: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
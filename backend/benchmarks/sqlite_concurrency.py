@@ -0,0 +1,205 @@
+"""
+Run concurrent readers and writers against a scratch SQLite database, once
+with Django's stock SQLite configuration and once with the tuned settings
+(WAL pragmas, persistent connections, IMMEDIATE transactions, read replica
+router), and compare throughput.
+
+Usage: python benchmarks/sqlite_concurrency.py [--readers N] [--writers N] [--seconds N]
+
+Each configuration runs in its own process because Django settings are fixed
+once loaded, and readers and writers are forked processes like gunicorn
+workers. The real db.sqlite3 is never touched.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MODES = ('stock', 'tuned')
+
+
+def setup_django(mode, db_path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
+    from django.conf import settings
+    import django
+
+    if mode == 'stock':
+        # What settings.py shipped with: rollback journal, a connection per request
+        settings.DATABASES = {
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': db_path},
+        }
+        settings.DATABASE_ROUTERS = []
+    else:
+        for database in settings.DATABASES.values():
+            database['NAME'] = db_path
+    # Measure the database, not the response cache
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.DEBUG = False
+    django.setup()
+
+    import logging
+    logging.getLogger('api.views').setLevel(logging.CRITICAL)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+
+def seed(members, loans, writers):
+    from django.core.management import call_command
+    from api.models import BookStock, IssuedBooks, Members
+    from api.statistics import rebuild_statistics
+
+    call_command('migrate', verbosity=0)
+    today = date.today()
+    Members.objects.bulk_create([
+        Members(member_name=f"Member {i}", member_email=f"m{i}@example.com",
+                member_phone="9999999999", end_date=today + timedelta(days=365))
+        for i in range(members)
+    ], batch_size=5000)
+    member_ids = list(Members.objects.values_list('member_id', flat=True))
+    IssuedBooks.objects.bulk_create([
+        IssuedBooks(book_id=str(100000 + i), book_title=f"Book {i}", book_author="Author",
+                    issued_to_member_id=member_ids[i % len(member_ids)],
+                    return_date=today + timedelta(days=i % 30 - 15),
+                    status="Issued" if i % 5 == 0 else "Returned")
+        for i in range(loans)
+    ], batch_size=5000)
+    # One title per writer with plenty of copies, so writers never see a 409
+    BookStock.objects.bulk_create([BookStock(book_id=i, quantity=1000) for i in range(1, writers + 1)])
+    rebuild_statistics()
+    return member_ids
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(mode, os.path.join(tmp, 'bench.sqlite3'))
+        from django.db import connections
+        from rest_framework.test import APIClient
+
+        member_ids = seed(args.members, args.loans, args.writers)
+        with connections['default'].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+        connections.close_all()
+
+        # Forked worker processes, like gunicorn workers, so the GIL does not hide lock contention
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        results = context.Queue()
+        return_date = (date.today() + timedelta(days=7)).isoformat()
+        pages = max(1, args.members // 20)
+
+        def reader(index):
+            client = APIClient()
+            reads, errors, latencies = 0, 0, []
+            n = index
+            while not stop.is_set():
+                n += 1
+                url = '/issued_books_list/?count=20' if n % 2 else f'/members_page/?page={n % pages + 1}&count=20'
+                started = time.perf_counter()
+                try:
+                    ok = client.get(url).status_code == 200
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                reads += ok
+                errors += not ok
+            return {'reads': reads, 'errors': errors, 'read_latencies': latencies}
+
+        def writer(index):
+            client = APIClient()
+            book_id = str(index + 1)
+            writes, errors = 0, 0
+            while not stop.is_set():
+                try:
+                    issued = client.post('/issued_books/', {
+                        'book_id': book_id, 'book_title': "Title", 'book_author': "Author",
+                        'issued_to_member': member_ids[(writes + index) % len(member_ids)],
+                        'return_date': return_date,
+                    }, format='json').status_code == 201
+                    returned = issued and client.put(
+                        '/issued_books/', {'book_id': book_id}, format='json'
+                    ).status_code == 200
+                except Exception:
+                    issued = returned = False
+                writes += issued + returned
+                errors += (not issued) + (issued and not returned)
+            return {'writes': writes, 'errors': errors}
+
+        def run(target, index):
+            try:
+                results.put(target(index))
+            finally:
+                connections.close_all()
+
+        workers = [context.Process(target=run, args=(reader, i)) for i in range(args.readers)]
+        workers += [context.Process(target=run, args=(writer, i)) for i in range(args.writers)]
+        for worker in workers:
+            worker.start()
+        time.sleep(args.seconds)
+        stop.set()
+
+        totals = {'reads': 0, 'writes': 0, 'errors': 0, 'read_latencies': []}
+        for _ in workers:
+            for key, value in results.get().items():
+                totals[key] += value
+        for worker in workers:
+            worker.join()
+
+        latencies = sorted(totals['read_latencies'])
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        return {
+            'mode': mode,
+            'journal_mode': journal_mode,
+            'reads_per_second': totals['reads'] / args.seconds,
+            'writes_per_second': totals['writes'] / args.seconds,
+            'errors': totals['errors'],
+            'read_p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+            'read_p95_ms': p95,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--loans', type=int, default=50000)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    results = []
+    for mode in MODES:
+        print(f"Running {mode} configuration for {args.seconds:g}s "
+              f"({args.readers} readers, {args.writers} writers)...", flush=True)
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode] + sys.argv[1:],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':<8}{'journal':<10}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for result in results:
+        print(f"{result['mode']:<8}{result['journal_mode']:<10}{result['reads_per_second']:>10.0f}"
+              f"{result['writes_per_second']:>10.0f}{result['errors']:>8}"
+              f"{result['read_p50_ms']:>9.1f}{result['read_p95_ms']:>9.1f}")
+    stock, tuned = results
+    if stock['reads_per_second'] and stock['writes_per_second']:
+        print(f"\nreads x{tuned['reads_per_second'] / stock['reads_per_second']:.2f}, "
+              f"writes x{tuned['writes_per_second'] / stock['writes_per_second']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+gunicorn settings picked up from this directory, e.g.
+    gunicorn library_backend.wsgi --workers 4
+
+Workers record metrics in per-process files under PROMETHEUS_MULTIPROC_DIR,
+so GET /metrics from any worker reports the totals of all of them.
+"""
+import os
+import shutil
+from pathlib import Path
+
+# Set before the workers import the app, which creates the metrics
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', str(Path(__file__).resolve().parent / 'prometheus_metrics')
+)
+
+
+def on_starting(server):
+    # Files from a previous run would be added to this run's totals
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
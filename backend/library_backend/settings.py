@@ -50,7 +50,14 @@ CORS_ALLOWED_ORIGINS = [
 # Allow all CORS requests
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Let the frontend read the instrumentation headers
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'X-Query-Count', 'X-Cache']
+
 MIDDLEWARE = [
+    # Outermost, so its total covers the rest of the stack
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -85,11 +92,109 @@ WSGI_APPLICATION = 'library_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Applied to every new SQLite connection. WAL lets readers run while a write is
+# in progress, and synchronous=NORMAL is durable enough under WAL.
+SQLITE_INIT_COMMAND = ';'.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',  # 64 MB page cache per connection
+    'PRAGMA mmap_size=268435456',  # 256 MB of the file memory-mapped
+    'PRAGMA temp_store=MEMORY',
+])
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_INIT_COMMAND,
+            'timeout': 20,
+            # Take the write lock at BEGIN so transactions queue instead of failing to upgrade
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Read-only connection to the same WAL file, used by api.routers.ReadReplicaRouter
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_INIT_COMMAND + ';PRAGMA query_only=ON',
+            'timeout': 20,
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['api.routers.ReadReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Public GET responses, see api/response_cache.py. Entries are keyed on data
+    # versions, so a per-process cache is still invalidated by writes in any
+    # worker; switch to FileBasedCache to share entries between workers:
+    #   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #   'LOCATION': BASE_DIR / 'response_cache',
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Set to False to serve every public GET from the database
+RESPONSE_CACHE_ENABLED = True
+
+# Add Server-Timing and X-Query-Count headers to every response (api/middleware.py).
+# When False the middleware is dropped at startup.
+SERVER_TIMING_ENABLED = False
+
+# Per-view request, latency, query count, cache and upstream metrics served at
+# /metrics (api/metrics.py). Multi-worker servers need PROMETHEUS_MULTIPROC_DIR,
+# which gunicorn.conf.py sets up.
+METRICS_ENABLED = True
+
+# Log SQL slower than SLOW_QUERY_THRESHOLD_MS, with its view, redacted parameters
+# and EXPLAIN QUERY PLAN, to SLOW_QUERY_LOG_PATH (api/slow_queries.py).
+# Summarize with: python manage.py summarize_slow_queries
+SLOW_QUERY_LOG_ENABLED = False
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_PATH = BASE_DIR / 'slow_queries.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_PATH,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+            # Nothing is created until the first slow query
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'api.slow_query_log': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -10,7 +10,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
 django.setup()
 
 from api.models import Members, IssuedBooks, BookStock
+from api.statistics import rebuild_statistics
+from api.versioning import bump_data_version
 from django.db import transaction
+from django.core.management import call_command
 
 # Clear existing data
 def clear_existing_data():
@@ -301,6 +304,14 @@ def populate_database():
         books, book_ids = create_books(200)
         issue_books_to_members(members, books, book_ids)
         
+        # Bring BookStock.issued_count in line with the loans created above
+        call_command('reconcile_stock')
+        
+        # Recount the statistics snapshot from the tables and invalidate every
+        # cached response and ETag, in case anything above bypassed the signals
+        rebuild_statistics()
+        bump_data_version()
+        
         print("Database populated successfully!")
         return True
     except Exception as e:
@@ -9,6 +9,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_backend.settings')
 django.setup()
 
 from api.models import BookStock, IssuedBooks, Members
+from api.statistics import rebuild_statistics
+from api.versioning import bump_data_version
+from django.core.management import call_command
 
 # Clear existing books
 BookStock.objects.all().delete()
@@ -114,6 +117,8 @@ if members:
         member.books_issued += 1
         member.save()
     
+    # Bring BookStock.issued_count in line with the loans created above
+    call_command('reconcile_stock')
     print(f"Assigned books to members successfully.")
     
     # Add random dues to some members
@@ -125,4 +130,9 @@ if members:
 else:
     print("No members found in the database.")
 
+# Recount the statistics snapshot from the tables and invalidate every
+# cached response and ETag, in case anything above bypassed the signals
+rebuild_statistics()
+bump_data_version()
+
 print("Database update completed successfully.")
\ No newline at end of file